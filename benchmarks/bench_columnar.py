@@ -0,0 +1,63 @@
+"""Benchmark: per-record vs columnar redaction of a batch of uniform records
+
+Usage:
+    python benchmarks/bench_columnar.py [--rows 1000 10000] [--repeat 5]
+"""
+
+import argparse
+import time
+
+from roma_blackbox import CombinedPIIRedactor, Policy
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+
+
+def make_rows(count: int) -> list:
+    cities = ["Paris", "Lagos", "Lima", "Osaka"]
+    return [
+        {
+            "id": i,
+            "name": f"customer {i}",
+            "note": f"contact user{i}@example.com about order {i}" if i % 5 == 0 else "shipped",
+            "city": cities[i % len(cities)],
+            "client_ip": f"10.0.{i % 256}.1",
+            "score": i * 0.5,
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    policy = Policy(pii_fields=["email", "ssn", "phone", "credit_card", "ip"])
+    redactors = {
+        "enhanced": EnhancedPIIRedactor(),
+        "combined": CombinedPIIRedactor(policy),
+    }
+    print(f"{'redactor':<10} {'rows':>7} {'per-record ms':>14} {'columnar ms':>12} {'speedup':>8}")
+    for count in args.rows:
+        rows = make_rows(count)
+        for name, redactor in redactors.items():
+            assert redactor.redact_records(rows) == [redactor.redact(row) for row in rows]
+            per_record = best_of(args.repeat, lambda: [redactor.redact(row) for row in rows])
+            columnar = best_of(args.repeat, lambda: redactor.redact_records(rows))
+            print(
+                f"{name:<10} {count:>7} {per_record * 1000:>14.1f} {columnar * 1000:>12.1f}"
+                f" {per_record / columnar:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Benchmark: contains_pii() vs. scan() and redact() by position of the first hit
+
+Usage:
+    python benchmarks/bench_contains_pii.py [--messages 500] [--size-kb 2] [--repeat 5]
+"""
+
+import argparse
+import timeit
+
+from bench_pii_engine import make_text
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--size-kb", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    redactor = EnhancedPIIRedactor()
+    clean = [make_text(args.size_kb, 0.0, seed=i) for i in range(args.messages)]
+    print(f"{'first hit':<10} {'contains_pii ms':>16} {'scan ms':>10} {'redact ms':>10}")
+    for label, position in (("start", 0), ("middle", args.messages // 2), ("none", None)):
+        messages = list(clean)
+        if position is not None:
+            messages[position] += " reach me at jane@example.com"
+        payload = {"conversation": [{"role": "user", "content": m} for m in messages]}
+        assert (redactor.contains_pii(payload) is None) == (position is None)
+        timings = [
+            min(timeit.repeat(lambda: fn(payload), number=1, repeat=args.repeat))
+            for fn in (redactor.contains_pii, redactor.scan, redactor.redact)
+        ]
+        print(
+            f"{label:<10} {timings[0] * 1000:>16.2f} {timings[1] * 1000:>10.2f} {timings[2] * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
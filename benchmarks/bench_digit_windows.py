@@ -0,0 +1,63 @@
+"""Benchmark: numeric patterns scanned in digit windows vs. over the whole text
+
+Compares the default pattern set with a copy whose numeric patterns have no
+``digit_window`` (so they run inside the single combined scan) on prose with
+a few numbers, sparse PII, and number-heavy text.
+
+Usage:
+    python benchmarks/bench_digit_windows.py [--size-kb 8] [--repeat 7]
+"""
+
+import argparse
+import copy
+import random
+import timeit
+
+from bench_pii_engine import make_text
+from roma_blackbox.pii_patterns import CompiledPatternSet, EnhancedPIIRedactor
+
+NUMBER = 20
+
+
+def make_prose(size_kb: int, number_rate: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    text = make_text(size_kb, 0.0, seed).split(" ")
+    for i in range(len(text)):
+        if rng.random() < number_rate:
+            text[i] = str(rng.randint(1, 2030))
+    return " ".join(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    patterns = EnhancedPIIRedactor.PATTERNS
+    unwindowed = [copy.copy(p) for p in patterns]
+    for p in unwindowed:
+        p.digit_window = None
+    engines = (CompiledPatternSet(unwindowed), CompiledPatternSet(patterns))
+
+    print(f"{'corpus':<10} {'whole text':>12} {'windows':>12} {'speedup':>8}")
+    corpora = (
+        ("prose", make_prose(args.size_kb, 0.01)),
+        ("sparse", make_text(args.size_kb, 0.01)),
+        ("numbers", make_prose(args.size_kb, 0.5)),
+    )
+    for label, text in corpora:
+        assert engines[0].redact(text) == engines[1].redact(text)
+        timings = [
+            min(timeit.repeat(lambda: engine.redact(text), number=NUMBER, repeat=args.repeat))
+            / NUMBER
+            for engine in engines
+        ]
+        print(
+            f"{label:<10} {timings[0] * 1e6:>10.0f}us {timings[1] * 1e6:>10.0f}us"
+            f" {timings[0] / timings[1]:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
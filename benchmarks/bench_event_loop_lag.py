@@ -0,0 +1,75 @@
+"""Benchmark: event-loop lag while BlackBoxWrapper redacts a large agent result
+
+A ticker coroutine sleeps 1 ms at a time and records how late it wakes up
+while the wrapper processes one large result. Inline redaction blocks the
+loop for the whole scan; offloading to a thread or process pool keeps it
+responsive.
+
+Usage:
+    python benchmarks/bench_event_loop_lag.py [--size-mb 5] [--strings 500]
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from bench_pii_engine import make_text
+from roma_blackbox import BlackBoxWrapper, Policy
+
+
+class LargeResultAgent:
+    def __init__(self, result):
+        self.result = result
+
+    async def run(self, task: str, **kwargs):
+        return {"result": self.result}
+
+
+async def ticker(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def measure(wrapper: BlackBoxWrapper) -> tuple:
+    lags = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await wrapper.run(request_id="bench", task="summarise")
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, max(lags)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--strings", type=int, default=500)
+    args = parser.parse_args()
+
+    size_kb = max(1, int(args.size_mb * 1024 / args.strings))
+    result = {"messages": [make_text(size_kb, 0.01, seed=i) for i in range(args.strings)]}
+    agent = LargeResultAgent(result)
+    policy = Policy(pii_fields=["email", "ssn", "phone", "credit_card", "ip"])
+
+    print(f"{'mode':<8} {'request s':>10} {'max loop lag ms':>16}")
+    with ThreadPoolExecutor(1) as threads, ProcessPoolExecutor(1) as processes:
+        for mode, executor, threshold in (
+            ("inline", None, None),
+            ("thread", threads, 0),
+            ("process", processes, 0),
+        ):
+            wrapper = BlackBoxWrapper(
+                agent, policy, redaction_executor=executor, offload_threshold=threshold
+            )
+            elapsed, lag = asyncio.run(measure(wrapper))
+            print(f"{mode:<8} {elapsed:>10.2f} {lag * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
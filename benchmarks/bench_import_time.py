@@ -0,0 +1,54 @@
+"""Benchmark: cold `import roma_blackbox` time, checked against a budget
+
+Each measurement times the import statement in a fresh interpreter.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 15] [--budget-ms 30]
+
+Exits with status 1 when the median import time exceeds the budget.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    "import roma_blackbox": "import roma_blackbox",
+    "BlackBoxWrapper": "from roma_blackbox import BlackBoxWrapper",
+}
+
+
+def import_time_ms(statement: str) -> float:
+    """Wall time of ``statement`` in a fresh interpreter, in milliseconds"""
+    script = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print((time.perf_counter() - start) * 1000)"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    return float(completed.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    results = {}
+    for label, statement in STATEMENTS.items():
+        import_time_ms(statement)  # make sure bytecode caches are written
+        results[label] = statistics.median(import_time_ms(statement) for _ in range(args.runs))
+        print(f"{label:<22} {results[label]:>8.1f} ms")
+
+    median = results["import roma_blackbox"]
+    if median > args.budget_ms:
+        print(f"FAIL: import roma_blackbox took {median:.1f} ms, budget {args.budget_ms:.1f} ms")
+        sys.exit(1)
+    print(f"OK: within {args.budget_ms:.1f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark: per-record logging overhead of PII redaction
+
+Compares, on the logging thread, a plain StreamHandler, the same handler
+with a RedactingLogFilter, and a BackgroundRedactingHandler that moves
+redaction to a worker thread. Half the records use %-style arguments, half
+are constant messages (which the filter caches).
+
+Usage:
+    python benchmarks/bench_logging.py [--records 20000]
+"""
+
+import argparse
+import io
+import logging
+import time
+
+from roma_blackbox import BackgroundRedactingHandler, RedactingLogFilter
+
+
+def log_records(logger: logging.Logger, records: int) -> float:
+    start = time.perf_counter()
+    for i in range(records):
+        if i % 2:
+            logger.info("user %s called from %s", f"user{i}@example.com", "10.0.0.1")
+        else:
+            logger.info("health check ok for admin@example.com")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'handler':<12} {'us/record':>10} {'drain s':>8}")
+    for mode in ("plain", "filter", "background"):
+        logger = logging.getLogger(f"bench.{mode}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        stream_handler = logging.StreamHandler(io.StringIO())
+        if mode == "background":
+            handler = BackgroundRedactingHandler(stream_handler)
+        else:
+            handler = stream_handler
+            if mode == "filter":
+                handler.addFilter(RedactingLogFilter())
+        logger.addHandler(handler)
+
+        elapsed = log_records(logger, args.records)
+        start = time.perf_counter()
+        handler.close()
+        drain = time.perf_counter() - start
+        logger.removeHandler(handler)
+        print(f"{mode:<12} {elapsed / args.records * 1e6:>10.2f} {drain:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
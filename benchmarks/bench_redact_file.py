@@ -0,0 +1,68 @@
+"""Benchmark: redact_file() throughput and peak memory by file size
+
+Each size runs in a fresh process so its peak RSS is measured on its own.
+
+Usage:
+    python benchmarks/bench_redact_file.py [--size-mb 10 100]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RUN = """
+import resource, sys, time
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+start = time.perf_counter()
+counts = EnhancedPIIRedactor().redact_file(sys.argv[1], sys.argv[2])
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, sum(counts.values()))
+"""
+
+
+def write_jsonl(path: str, size_mb: float):
+    with open(path, "w", encoding="utf-8") as f:
+        written = 0
+        i = 0
+        while written < size_mb * 1e6:
+            record = {
+                "id": i,
+                "user": f"user{i}@example.com" if i % 10 == 0 else f"user {i}",
+                "message": "the agent called a tool and returned a result with status ok",
+                "client": f"10.0.{i % 256}.{i % 200}",
+            }
+            line = json.dumps(record) + "\n"
+            f.write(line)
+            written += len(line)
+            i += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, nargs="+", default=[10, 100])
+    args = parser.parse_args()
+
+    print(f"{'file MB':>8} {'seconds':>8} {'MB/s':>6} {'peak RSS MB':>12} {'matches':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "in.jsonl")
+        destination = os.path.join(tmp, "out.jsonl")
+        for size_mb in args.size_mb:
+            write_jsonl(source, size_mb)
+            output = subprocess.run(
+                [sys.executable, "-c", RUN, source, destination],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            elapsed, peak, matches = float(output[0]), float(output[1]), int(output[2])
+            print(
+                f"{size_mb:>8.0f} {elapsed:>8.2f} {size_mb / elapsed:>6.1f} {peak:>12.0f}"
+                f" {matches:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
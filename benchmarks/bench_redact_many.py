@@ -0,0 +1,36 @@
+"""Benchmark: redact_many() throughput by number of worker processes
+
+Usage:
+    python benchmarks/bench_redact_many.py [--items 2000] [--size-kb 4] [--workers 1 2 4]
+"""
+
+import argparse
+import time
+
+from bench_pii_engine import make_text
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--size-kb", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    items = [make_text(args.size_kb, 0.01, seed=i) for i in range(args.items)]
+    megabytes = sum(len(item) for item in items) / 1e6
+    redactor = EnhancedPIIRedactor()
+    expected = None
+    print(f"{'workers':>8} {'seconds':>10} {'MB/s':>8}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        result = redactor.redact_many(items, workers=workers)
+        elapsed = time.perf_counter() - start
+        expected = expected or result
+        assert result == expected
+        print(f"{workers:>8} {elapsed:>10.2f} {megabytes / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark: serial vs. sharded redaction of one very large log dump
+
+Usage:
+    python benchmarks/bench_sharding.py [--size-mb 50] [--workers 2 4]
+"""
+
+import argparse
+import resource
+import time
+
+from bench_pii_engine import make_text
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+from roma_blackbox.sharding import ShardedRedactor
+
+
+def make_log(size_mb: float) -> str:
+    lines = []
+    length = 0
+    i = 0
+    while length < size_mb * 1e6:
+        line = f"[worker-{i % 8}] request {i}; {make_text(1, 0.01, seed=i % 64)[:200]}\n"
+        lines.append(line)
+        length += len(line)
+        i += 1
+    return "".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    args = parser.parse_args()
+
+    text = make_log(args.size_mb)
+    redactor = EnhancedPIIRedactor()
+    print(f"{'workers':>8} {'seconds':>10} {'MB/s':>8}")
+    start = time.perf_counter()
+    expected = redactor.redact(text)
+    elapsed = time.perf_counter() - start
+    print(f"{'serial':>8} {elapsed:>10.2f} {len(text) / 1e6 / elapsed:>8.1f}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        result = ShardedRedactor(redactor, workers=workers).redact(text)
+        elapsed = time.perf_counter() - start
+        assert result == expected
+        print(f"{workers:>8} {elapsed:>10.2f} {len(text) / 1e6 / elapsed:>8.1f}")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS of this process: {peak:.0f} MB for {len(text) / 1e6:.0f} MB of text")
+
+
+if __name__ == "__main__":
+    main()
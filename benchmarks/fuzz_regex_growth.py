@@ -0,0 +1,79 @@
+"""Fuzz harness: search for inputs on which a PII regex runs in superlinear time
+
+Random "units" are built from characters and keywords that the built-in
+patterns care about; each unit is repeated to two input sizes and the time
+for a full findall() is compared. A growth exponent near 1 is linear, near 2
+quadratic.
+
+Usage:
+    python benchmarks/fuzz_regex_growth.py [--trials 300] [--size 2000] [--max-exponent 1.5]
+
+Exits with status 1 when any pattern (or the combined scan) exceeds
+``--max-exponent`` on the worst unit found.
+"""
+
+import argparse
+import math
+import random
+import sys
+import timeit
+
+from roma_blackbox.pii_patterns import CompiledPatternSet, EnhancedPIIRedactor
+
+TOKENS = list("aZ019x.-_@:=+/%( )|") + [" ", "Bearer ", "ghp_", "0x", "AKIA", "api_key="]
+# Units known to trigger backtracking in earlier versions of the patterns
+KNOWN_UNITS = ["a.", "b.", "1-", "1 ", "1.", "1234-", "a", "1", "a@", "a@b", "0x1", "ghp_a"]
+
+
+def growth(findall, unit: str, size: int, prefix: str = "", suffix: str = "@") -> float:
+    """Growth exponent of ``findall`` between ``size`` and 4x ``size`` characters"""
+    times = []
+    for length in (size, size * 4):
+        text = prefix + unit * max(1, length // len(unit)) + suffix
+        times.append(min(timeit.repeat(lambda: findall(text), number=1, repeat=3)))
+    return math.log(max(times[1], 1e-7) / max(times[0], 1e-7), 4)
+
+
+def targets():
+    """Every built-in pattern's findall, plus the combined single-pass scan"""
+    found = {p.name: p.pattern.findall for p in EnhancedPIIRedactor.PATTERNS}
+    engine = CompiledPatternSet(EnhancedPIIRedactor.PATTERNS)
+    found["combined"] = lambda text: list(engine.spans(text))
+    return found
+
+
+def search(trials: int, size: int, seed: int = 0) -> dict:
+    """Worst (exponent, unit) per target over known and random units"""
+    rng = random.Random(seed)
+    units = KNOWN_UNITS + [
+        "".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 4))) for _ in range(trials)
+    ]
+    worst = {}
+    for name, findall in targets().items():
+        for unit in units:
+            exponent = growth(findall, unit, size)
+            if exponent > worst.get(name, (-1.0, ""))[0]:
+                worst[name] = (exponent, unit)
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=300)
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--max-exponent", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    worst = search(args.trials, args.size, args.seed)
+    failed = False
+    print(f"{'pattern':<18} {'exponent':>9}  worst unit")
+    for name, (exponent, unit) in worst.items():
+        flag = "  <-- superlinear" if exponent > args.max_exponent else ""
+        failed = failed or bool(flag)
+        print(f"{name:<18} {exponent:>9.2f}  {unit!r}{flag}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
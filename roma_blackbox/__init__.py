@@ -2,14 +2,49 @@
 roma-blackbox: Privacy-first monitoring for ROMA agents
 """
 
+from importlib import import_module
+
+# Same as typing.TYPE_CHECKING, without importing typing at startup
+TYPE_CHECKING = False
+
 __version__ = "0.1.0"
 
-from .wrapper import BlackBoxWrapper, BlackBoxResult
-from .policy import Policy, STRICT_PRIVACY, DEVELOPMENT, PRODUCTION
-from .storage import AbstractStorage, MemoryStorage, PostgreSQLStorage, JSONFileStorage
-from .metrics import AbstractMetrics, PrometheusMetrics, InMemoryMetrics
-from .filters import PIIRedactor, TraceFilter
-from .attestation import AttestationGenerator
+# Public names and the submodule each one lives in. They are imported on
+# first access (PEP 562) so that `import roma_blackbox` stays cheap for
+# short-lived workers, and optional integrations load only when used.
+_EXPORTS = {
+    "BlackBoxWrapper": "wrapper",
+    "BlackBoxResult": "wrapper",
+    "Policy": "policy",
+    "STRICT_PRIVACY": "policy",
+    "DEVELOPMENT": "policy",
+    "PRODUCTION": "policy",
+    "AbstractStorage": "storage",
+    "MemoryStorage": "storage",
+    "PostgreSQLStorage": "storage",
+    "JSONFileStorage": "storage",
+    "AbstractMetrics": "metrics",
+    "PrometheusMetrics": "metrics",
+    "InMemoryMetrics": "metrics",
+    "PIIRedactor": "filters",
+    "CombinedPIIRedactor": "filters",
+    "TraceFilter": "filters",
+    "AttestationGenerator": "attestation",
+    # Enhanced PII detection
+    "EnhancedPIIRedactor": "pii_patterns",
+    "PIIPattern": "pii_patterns",
+    "PIISpan": "pii_patterns",
+    "redact_pii": "pii_patterns",
+    "contains_pii": "pii_patterns",
+    "redact_file": "pii_patterns",
+    "RedactionCache": "cache",
+    "StreamingRedactor": "streaming",
+    "PatternProfiler": "profiling",
+    "ConversationRedactor": "conversation",
+    "ShardedRedactor": "sharding",
+    "RedactingLogFilter": "log_filters",
+    "BackgroundRedactingHandler": "log_filters",
+}
 
 __all__ = [
     "BlackBoxWrapper",
@@ -26,15 +61,51 @@ __all__ = [
     "PrometheusMetrics",
     "InMemoryMetrics",
     "PIIRedactor",
+    "CombinedPIIRedactor",
     "TraceFilter",
     "AttestationGenerator",
 ]
 
-# Optional integrations
-try:
-    from . import integrations
-except ImportError:
-    integrations = None
 
-# Enhanced PII detection
-from .pii_patterns import EnhancedPIIRedactor, PIIPattern, redact_pii
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is not None:
+        value = getattr(import_module(f".{module}", __name__), name)
+    elif name == "integrations":
+        # Optional integrations
+        try:
+            value = import_module(".integrations", __name__)
+        except ImportError:
+            value = None
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | {"integrations"})
+
+
+if TYPE_CHECKING:
+    from . import integrations
+    from .wrapper import BlackBoxWrapper, BlackBoxResult
+    from .policy import Policy, STRICT_PRIVACY, DEVELOPMENT, PRODUCTION
+    from .storage import AbstractStorage, MemoryStorage, PostgreSQLStorage, JSONFileStorage
+    from .metrics import AbstractMetrics, PrometheusMetrics, InMemoryMetrics
+    from .filters import CombinedPIIRedactor, PIIRedactor, TraceFilter
+    from .attestation import AttestationGenerator
+    from .pii_patterns import (
+        EnhancedPIIRedactor,
+        PIIPattern,
+        PIISpan,
+        contains_pii,
+        redact_file,
+        redact_pii,
+    )
+    from .cache import RedactionCache
+    from .streaming import StreamingRedactor
+    from .profiling import PatternProfiler
+    from .conversation import ConversationRedactor
+    from .sharding import ShardedRedactor
+    from .log_filters import BackgroundRedactingHandler, RedactingLogFilter
@@ -0,0 +1,95 @@
+"""Bounded caches for redaction results"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class RedactionCache:
+    """Thread-safe LRU cache from input strings to their redacted form.
+
+    Bounded both by entry count and by the approximate memory held by keys
+    and values. Strings shorter than ``min_length`` are never cached: for
+    those, hashing and locking cost more than redacting them again.
+
+    One instance can be shared by several redactors or BlackBoxWrappers;
+    callers namespace their keys so different pattern sets never collide.
+    """
+
+    def __init__(
+        self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024, min_length: int = 64
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.min_length = min_length
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, text: str, redacted: str):
+        size = sys.getsizeof(text)
+        if redacted is not text:
+            size += sys.getsizeof(redacted)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (redacted, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def remember(table: Dict, lock: threading.Lock, key: Hashable, value: Any, max_entries: int) -> Any:
+    """Store ``value`` in a bounded memo ``table`` shared between threads.
+
+    Lookups read ``table`` without the lock; every insert goes through here
+    and evicts the oldest entries once ``max_entries`` are held. Two threads
+    missing on the same key both store it, which is harmless for values that
+    only depend on the key. Returns ``value``.
+    """
+    with lock:
+        while table and len(table) >= max_entries:
+            table.pop(next(iter(table)), None)
+        table[key] = value
+    return value
@@ -0,0 +1,99 @@
+"""Incremental redaction of append-only conversation histories"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from .pii_patterns import EnhancedPIIRedactor
+
+_MISSING = object()
+
+
+def _content_key(message: Any) -> bytes:
+    if isinstance(message, str):
+        data = b"s" + message.encode("utf-8", "surrogatepass")
+    else:
+        data = b"r" + repr(message).encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class ConversationRedactor:
+    """Redacts chat histories that grow by one turn at a time.
+
+    Agents are usually handed the whole history on every turn. Redacting it
+    from scratch each time costs O(N^2) over a conversation; this class
+    remembers the redacted form of every message it has seen, by content
+    hash, per conversation id, so each turn only redacts the new messages.
+
+    Memory is bounded twice: each conversation remembers at most
+    ``max_messages`` messages, and at most ``max_conversations``
+    conversations are kept (least recently used evicted first). Once a
+    conversation is full, no more of its messages are remembered: the
+    first ``max_messages`` keep being reused and only the later ones are
+    redacted again on every turn. (Evicting old messages instead would
+    miss on every message of every turn, since the whole history is read
+    in order each time.) Keep ``max_messages`` above the longest history
+    you expect.
+
+    Redacted messages are shared between calls and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        redactor: Optional[EnhancedPIIRedactor] = None,
+        max_conversations: int = 1000,
+        max_messages: int = 1000,
+    ):
+        if max_conversations <= 0:
+            raise ValueError("max_conversations must be positive")
+        if max_messages <= 0:
+            raise ValueError("max_messages must be positive")
+        self.redactor = redactor or EnhancedPIIRedactor()
+        self.max_conversations = max_conversations
+        self.max_messages = max_messages
+        self._conversations: "OrderedDict[Hashable, Dict[bytes, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def redact(self, conversation_id: Hashable, messages: List[Any]) -> List[Any]:
+        """Redact ``messages``, reusing results for messages seen before"""
+        with self._lock:
+            seen = self._conversations.pop(conversation_id, None)
+            if seen is None:
+                seen = {}
+            # Re-inserted as the most recently used conversation
+            self._conversations[conversation_id] = seen
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+        redacted = []
+        for message in messages:
+            key = _content_key(message)
+            with self._lock:
+                result = seen.get(key, _MISSING)
+                if result is not _MISSING:
+                    self.hits += 1
+            if result is _MISSING:
+                result = self.redactor.redact(message)
+                with self._lock:
+                    self.misses += 1
+                    if len(seen) < self.max_messages:
+                        seen[key] = result
+            redacted.append(result)
+        return redacted
+
+    def forget(self, conversation_id: Hashable):
+        """Drop everything remembered about one conversation"""
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "conversations": len(self._conversations),
+                "messages": sum(len(seen) for seen in self._conversations.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,10 +1,31 @@
 """Trace filtering and PII redaction"""
 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional
 import logging
+import re
+import threading
+
+from .cache import remember
+from .pii_patterns import EnhancedPIIRedactor
+from .traversal import transform, transform_columns
 
 logger = logging.getLogger(__name__)
 
+# Word boundaries inside a key: camelCase humps (``clientIP``, ``IPAddress``,
+# but not before the plural in ``IPs``) and separators; keys are rewritten to
+# lower_snake_case on these
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z]{2})")
+_SEPARATORS = re.compile(r"[\s.\-_]+")
+
+
+def _snake_case(name: str) -> str:
+    return _SEPARATORS.sub("_", _CAMEL_BOUNDARY.sub("_", name)).strip("_").lower()
+
+
+def _alternation(template: str, fields: Iterable[str]) -> Optional["re.Pattern"]:
+    fields = sorted(fields)
+    return re.compile(template % "|".join(map(re.escape, fields))) if fields else None
+
 
 class TraceFilter:
     """Filters traces from agent results based on policy"""
@@ -43,34 +64,133 @@ class PIIRedactor:
     """Redacts PII from data"""
 
     REDACTED_VALUE = "***REDACTED***"
+    # Distinct key sets remembered by the plan cache
+    MAX_PLANS = 1024
+    # Wider dicts are planned on every call; the field-name cache still
+    # spares them the pattern checks, and caching their plans would pin key
+    # tuples of unbounded size
+    MAX_PLAN_KEYS = 64
+    # Distinct key names remembered by the field-name cache
+    MAX_KEYS = 4096
 
-    def __init__(self, policy):
+    # Field names shorter than this hide inside ordinary words ("ip" in
+    # "description", "ssn" in "classname")
+    SHORT_FIELD = 4
+
+    def __init__(self, policy, strict_short_fields: bool = False):
+        """``strict_short_fields`` keeps short field names from matching
+        inside ordinary words: ``ip`` and ``ssn`` then only match a whole
+        word of the key (split on ``_``, ``-``, ``.``, spaces and camelCase),
+        optionally followed by a plural or version suffix (``client_ip``,
+        ``clientIPs``, ``ipv4``, ``ssns``), so ``description`` and
+        ``classname`` are left alone. Longer names still match anywhere in
+        the key, ignoring separators (``homeaddress``, ``creditCardNumber``).
+        """
         self.policy = policy
+        self.strict_short_fields = strict_short_fields
         self.pii_fields_lower = [f.lower() for f in policy.pii_fields]
+        fields = {_SEPARATORS.sub("", f).lower() for f in policy.pii_fields} - {""}
+        short = set()
+        if strict_short_fields:
+            short = {f for f in fields if len(f) < self.SHORT_FIELD}
+            fields -= short
+        else:
+            fields = set(self.pii_fields_lower) - {""}
+        # One alternation finds any configured field inside a key in a single pass
+        self._field_matcher = _alternation("%s", fields)
+        self._word_matcher = _alternation(r"(?:^|_)(?:%s)(?:e?s|v?\d+)?(?:_|$)", short)
+        self._field_decisions: Dict[str, bool] = {}
+        # Redaction plans keyed by a dict's keys, in order
+        self._plans: Dict[tuple, tuple] = {}
+        # Guards inserts into both caches; one redactor serves many threads
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
 
     def redact(self, data: Any) -> Any:
-        if isinstance(data, dict):
-            return self._redact_dict(data)
-        elif isinstance(data, list):
-            return [self.redact(item) for item in data]
-        else:
-            return data
+        # Only dicts holding PII fields (and their parents) are copied
+        return transform(data, None, plan=self._dict_plan, tuples=False)
+
+    def _dict_plan(self, data: Dict) -> tuple:
+        """Keys to mask and items to descend into, compiled once per key set
+
+        Agents return the same payload shapes over and over, so the PII field
+        check runs once per distinct set of keys instead of once per key.
+        Only dicts of up to ``MAX_PLAN_KEYS`` keys are remembered.
+        """
+        keys = tuple(data)
+        plan = self._plans.get(keys)
+        if plan is None:
+            masked = tuple(key for key in keys if self._is_pii_field(key))
+            kept = tuple(key for key in keys if key not in masked)
+            if masked:
+                logger.debug(f"Redacting PII fields: {', '.join(map(str, masked))}")
+            plan = (masked, kept)
+            if len(keys) <= self.MAX_PLAN_KEYS:
+                remember(self._plans, self._lock, keys, plan, self.MAX_PLANS)
+        masked, kept = plan
+        replaced = {key: self.REDACTED_VALUE for key in masked} if masked else None
+        return replaced, [(key, data[key]) for key in kept]
 
-    def _redact_dict(self, data: Dict) -> Dict:
-        redacted = {}
-        for key, value in data.items():
-            if self._is_pii_field(key):
-                redacted[key] = self.REDACTED_VALUE
-                logger.debug(f"Redacted PII field: {key}")
+    def _is_pii_field(self, field_name: Any) -> bool:
+        if not isinstance(field_name, str):
+            # Keys such as status codes or tuples have no name to match
+            return False
+        decision = self._field_decisions.get(field_name)
+        if decision is None:
+            decision = False
+            if self.strict_short_fields:
+                name = _SEPARATORS.sub("", field_name).lower()
+                words = self._word_matcher
+                decision = words is not None and words.search(_snake_case(field_name)) is not None
             else:
-                redacted[key] = self.redact(value)
-        return redacted
-
-    def _is_pii_field(self, field_name: str) -> bool:
-        field_lower = field_name.lower()
-        if field_lower in self.pii_fields_lower:
-            return True
-        for pii_field in self.pii_fields_lower:
-            if pii_field in field_lower:
-                return True
-        return False
+                name = field_name.lower()
+            matcher = self._field_matcher
+            decision = decision or (matcher is not None and matcher.search(name) is not None)
+            remember(self._field_decisions, self._lock, field_name, decision, self.MAX_KEYS)
+        return decision
+
+
+class CombinedPIIRedactor:
+    """Masks PII fields by key and redacts PII patterns in values, in one walk
+
+    Values under keys naming a field in ``policy.pii_fields`` (``emails``,
+    ``shippingAddress``, ``clientIp``; short names such as ``ip`` only as a
+    whole word, so not ``description``) are replaced with
+    PIIRedactor.REDACTED_VALUE before any regex runs on them; every other
+    string goes through the pattern redactor (by default one restricted to
+    the patterns the policy enables).
+    """
+
+    def __init__(self, policy, pattern_redactor: Optional[EnhancedPIIRedactor] = None):
+        self.policy = policy
+        self.field_redactor = PIIRedactor(policy, strict_short_fields=True)
+        self.pattern_redactor = pattern_redactor or EnhancedPIIRedactor.for_policy(policy)
+
+    def redact(self, data: Any) -> Any:
+        return transform(
+            data, self.pattern_redactor._redact_leaf, plan=self.field_redactor._dict_plan
+        )
+
+    def redact_records(self, records: Iterable[Any]) -> List[Any]:
+        """Redact a batch of uniform records column by column
+
+        Whether a key is a PII field is decided once per key for the whole
+        batch, and each remaining column of strings is redacted with a single
+        pattern scan (see EnhancedPIIRedactor.redact_column). The result
+        equals ``[self.redact(r) for r in records]``.
+        """
+        return transform_columns(
+            list(records),
+            self.pattern_redactor.redact_column,
+            self.redact,
+            masked=self.field_redactor._is_pii_field,
+            mask=PIIRedactor.REDACTED_VALUE,
+        )
@@ -0,0 +1,109 @@
+"""PII redaction for application logs"""
+
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Optional
+
+from .pii_patterns import EnhancedPIIRedactor
+
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+class RedactingLogFilter(logging.Filter):
+    """logging.Filter that redacts PII from log records with EnhancedPIIRedactor
+
+    Attach it to a handler: handler filters only run for records that passed
+    the logger and handler levels, so records that are never emitted are
+    never formatted or scanned. The formatted message replaces ``msg`` (with
+    ``args`` cleared), and exception and stack text are redacted as well.
+
+    Nothing is cached per message: messages logged without arguments are
+    mostly pre-formatted strings carrying the very values being redacted,
+    and arguments can combine with the format string into a match, so the
+    merged message is always scanned.
+    """
+
+    def __init__(self, redactor: Optional[EnhancedPIIRedactor] = None):
+        super().__init__()
+        self.redactor = redactor or EnhancedPIIRedactor()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.redact_record(record)
+        return True
+
+    def redact_record(self, record: logging.LogRecord):
+        redact = self.redactor._redact_string
+        if record.args:
+            record.msg = redact(record.getMessage())
+            record.args = None
+        elif isinstance(record.msg, str):
+            record.msg = redact(record.msg)
+        else:
+            record.msg = redact(record.getMessage())
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+            # Handlers would otherwise format the raw exception again
+            record.exc_info = None
+        if record.stack_info:
+            record.stack_info = redact(record.stack_info)
+
+
+class BackgroundRedactingHandler(logging.handlers.QueueHandler):
+    """Queues records on the calling thread; redacts and emits them in the background
+
+    The request path only pays for merging the message arguments and a
+    queue put. A daemon thread drains the queue up to ``batch_size``
+    records at a time, redacts each with a RedactingLogFilter and passes it
+    to ``handlers``. Call ``close()`` (or ``logging.shutdown()``) to flush.
+    """
+
+    def __init__(
+        self,
+        *handlers: logging.Handler,
+        redactor: Optional[EnhancedPIIRedactor] = None,
+        batch_size: int = 256,
+    ):
+        super().__init__(queue.SimpleQueue())
+        self.handlers = list(handlers)
+        self.redacting_filter = RedactingLogFilter(redactor)
+        self.batch_size = batch_size
+        self._stop = object()
+        self._thread = threading.Thread(target=self._drain, name="log-redaction", daemon=True)
+        self._thread.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so unlike QueueHandler there is
+        # no need to copy the record or run the formatter here. Arguments are
+        # still merged now, before the caller can mutate them.
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def _drain(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is self._stop:
+                    return
+                self.redacting_filter.redact_record(record)
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+
+    def close(self):
+        if self._thread.is_alive():
+            self.queue.put_nowait(self._stop)
+            self._thread.join()
+        for handler in self.handlers:
+            handler.flush()
+        super().close()
@@ -24,6 +24,11 @@ class AbstractMetrics(ABC):
     def record_pii_redaction(self, field: str):
         pass
 
+    def record_pii_batch(self, profile: Dict[str, Dict[str, float]]):
+        """Record a PatternProfiler batch: per pattern matches, chars_scanned,
+        chars_timed and seconds. Backends that do not override this ignore it."""
+        pass
+
     @abstractmethod
     def get_summary(self) -> Dict:
         pass
@@ -42,6 +47,9 @@ class NoOpMetrics(AbstractMetrics):
     def record_pii_redaction(self, field: str):
         pass
 
+    def record_pii_batch(self, profile: Dict[str, Dict[str, float]]):
+        pass
+
     def get_summary(self) -> Dict:
         return {}
 
@@ -60,6 +68,19 @@ class PrometheusMetrics(AbstractMetrics):
         self.pii_redactions = Counter(
             "roma_blackbox_pii_redactions_total", "PII redactions", ["field"]
         )
+        self.pii_scanned_chars = Counter(
+            "roma_blackbox_pii_scanned_chars_total", "Characters scanned for PII", ["pattern"]
+        )
+        self.pii_pattern_seconds = Counter(
+            "roma_blackbox_pii_pattern_seconds_total",
+            "Time each PII pattern takes alone on sampled strings",
+            ["pattern"],
+        )
+        self.pii_timed_chars = Counter(
+            "roma_blackbox_pii_timed_chars_total",
+            "Characters in the strings sampled for pattern timing",
+            ["pattern"],
+        )
 
     def record_request(self, status: str, latency_ms: int, cost_cents: float):
         self.request_counter.labels(status=status).inc()
@@ -75,6 +96,15 @@ class PrometheusMetrics(AbstractMetrics):
     def record_pii_redaction(self, field: str):
         self.pii_redactions.labels(field=field).inc()
 
+    def record_pii_batch(self, profile: Dict[str, Dict[str, float]]):
+        for pattern, stats in profile.items():
+            if stats["matches"]:
+                self.pii_redactions.labels(field=pattern).inc(stats["matches"])
+            self.pii_scanned_chars.labels(pattern=pattern).inc(stats["chars_scanned"])
+            if stats["chars_timed"]:
+                self.pii_pattern_seconds.labels(pattern=pattern).inc(stats["seconds"])
+                self.pii_timed_chars.labels(pattern=pattern).inc(stats["chars_timed"])
+
     def get_summary(self) -> Dict:
         return {"type": "prometheus", "endpoint": "/metrics"}
 
@@ -87,6 +117,7 @@ class InMemoryMetrics(AbstractMetrics):
         self.traces_stripped_count = 0
         self.break_glass_count = 0
         self.pii_redactions_by_field = {}
+        self.pii_profile = {}
 
     def record_request(self, status: str, latency_ms: int, cost_cents: float):
         self.requests[status] = self.requests.get(status, 0) + 1
@@ -102,6 +133,17 @@ class InMemoryMetrics(AbstractMetrics):
     def record_pii_redaction(self, field: str):
         self.pii_redactions_by_field[field] = self.pii_redactions_by_field.get(field, 0) + 1
 
+    def record_pii_batch(self, profile: Dict[str, Dict[str, float]]):
+        for pattern, stats in profile.items():
+            if stats["matches"]:
+                count = self.pii_redactions_by_field.get(pattern, 0) + stats["matches"]
+                self.pii_redactions_by_field[pattern] = count
+            totals = self.pii_profile.setdefault(
+                pattern, {"matches": 0, "chars_scanned": 0, "chars_timed": 0, "seconds": 0.0}
+            )
+            for key in totals:
+                totals[key] += stats[key]
+
     def get_summary(self) -> Dict:
         if not self.latencies:
             return {"requests": self.requests}
@@ -112,6 +154,7 @@ class InMemoryMetrics(AbstractMetrics):
             "traces_stripped": self.traces_stripped_count,
             "break_glass_activations": self.break_glass_count,
             "pii_redactions": self.pii_redactions_by_field,
+            "pii_profile": self.pii_profile,
         }
 
 
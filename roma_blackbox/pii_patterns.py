@@ -1,113 +1,1166 @@
 """Enhanced PII detection patterns"""
 
+import codecs
+import mmap
+import os
 import re
-from typing import Dict, Any, List, Tuple
+import threading
+import time
+from typing import Callable, Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .cache import RedactionCache, remember
+from .profiling import PatternProfiler
+from .traversal import iter_leaves, text_size, transform, transform_columns
+
+# Not available on every platform (e.g. Windows)
+_MADV_DONTNEED = getattr(mmap, "MADV_DONTNEED", None)
 
 
 class PIIPattern:
-    """Definition of a PII pattern with regex and replacement strategy"""
+    """Definition of a PII pattern with regex and replacement strategy
+
+    ``literals``, ``chars`` and ``min_digit_run`` are optional prefilter hints:
+    conditions every match must satisfy. A string that contains none of the
+    literals (case-insensitive), none of the chars, or no run of
+    ``min_digit_run`` digits is never scanned with this pattern.
+
+    ``anchors`` declares literals that every match starts at (or at most
+    ``anchor_window`` characters before). Anchored patterns are kept out of
+    the combined scan and only tried at the positions where an anchor occurs.
+    Anchors double as prefilter literals when ``literals`` is not given.
+
+    ``digit_window`` marks a numeric pattern: every match ends with a digit,
+    starts at most ``digit_window`` characters before a digit and never has
+    more than ``digit_window`` non-digits in a row. On long strings numeric
+    patterns are only run inside the windows around digits.
 
-    def __init__(self, name: str, pattern: str, replacement: str = "[REDACTED]"):
+    ``priority`` settles matches of different patterns starting at the same
+    offset: the highest priority wins, and equal priorities go to the
+    pattern listed first. The built-in patterns range from 0 (driver's
+    licenses) to 50 (emails).
+
+    The regex is compiled on first use, so defining patterns (including the
+    built-in ones, at import time) costs nothing until a redactor is built.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pattern: str,
+        replacement: str = "[REDACTED]",
+        literals: Optional[List[str]] = None,
+        chars: str = "",
+        min_digit_run: int = 0,
+        anchors: Optional[List[str]] = None,
+        anchor_window: int = 0,
+        digit_window: Optional[int] = None,
+        priority: int = 0,
+    ):
         self.name = name
-        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self._source = pattern
+        self._compiled: Optional["re.Pattern"] = None
         self.replacement = replacement
+        self.anchors = tuple(anchor.lower() for anchor in anchors or ())
+        self.anchor_window = anchor_window
+        self.literals = tuple(literal.lower() for literal in literals or ()) or self.anchors
+        self.chars = chars.lower()
+        self.min_digit_run = min_digit_run
+        self.digit_window = digit_window
+        self.priority = priority
+
+    @property
+    def pattern(self) -> "re.Pattern":
+        compiled = self._compiled
+        if compiled is None:
+            compiled = self._compiled = re.compile(self._source, re.IGNORECASE)
+        return compiled
+
+    @property
+    def has_prefilter(self) -> bool:
+        return bool(self.literals or self.chars or self.min_digit_run)
+
+
+class PIISpan(NamedTuple):
+    """Location of one PII match; the matched text itself is never kept
+
+    ``path`` is the sequence of dict keys and list indices leading to the
+    string inside the scanned data (empty for a bare string).
+    """
+
+    path: Tuple[Any, ...]
+    pattern: str
+    start: int
+    end: int
+
+
+# Backreferences would point at the wrong group once a pattern is wrapped
+# inside the combined alternation, so such patterns are never merged.
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+# Maps every ASCII digit to "0" and everything else to " ", so digit runs can
+# be found with a plain substring search over the translated bytes.
+_DIGIT = re.compile(r"\d")
+_DIGIT_MASK = bytes(48 if 48 <= i <= 57 else 32 for i in range(256))
+_DIGIT_RUNS: Dict[int, "re.Pattern"] = {}
+_DIGIT_CLUSTERS: Dict[int, "re.Pattern"] = {}
+
+
+def _fold_case(text: str) -> str:
+    """Lowercase non-ASCII ``text`` so literal checks agree with re.IGNORECASE"""
+    # The only non-ASCII characters IGNORECASE equates with ASCII letters.
+    # U+0130 is also the only character whose lowercase form is longer, so
+    # after this replacement offsets in the folded text match the original.
+    text = text.replace("\u0130", "i").replace("\u0131", "i").replace("\u017f", "s")
+    return text.lower()
+
+
+def _digit_run_regex(length: int) -> "re.Pattern":
+    # Non-ASCII text may hold non-ASCII decimal digits, which \d also matches
+    regex = _DIGIT_RUNS.get(length)
+    if regex is None:
+        regex = _DIGIT_RUNS[length] = re.compile(rf"\d{{{length}}}")
+    return regex
+
+
+def _digit_cluster_regex(gap: int) -> "re.Pattern":
+    # Digit runs joined by at most ``gap`` non-digits, plus any letters right
+    # after the last run so the window never ends inside a word
+    regex = _DIGIT_CLUSTERS.get(gap)
+    if regex is None:
+        regex = _DIGIT_CLUSTERS[gap] = re.compile(rf"\d+(?:\D{{1,{gap}}}\d+)*[^\W\d]*")
+    return regex
+
+
+class AnchorIndex:
+    """Finds where anchored patterns can match, from their anchor literals.
+
+    Built once per pattern set. Each anchor literal is located in the
+    case-folded text with a C-level substring search; the patterns that
+    declared it are then tried only at the few start offsets its window
+    allows, instead of being scanned over the whole string.
+    """
+
+    def __init__(self, indexed_patterns: List[Tuple[int, PIIPattern]]):
+        self.patterns = dict(indexed_patterns)
+        self.literals: Dict[str, List[int]] = {}
+        for index, pattern in indexed_patterns:
+            for anchor in pattern.anchors:
+                self.literals.setdefault(anchor, []).append(index)
+
+    def matches(self, text: str, pos: int = 0) -> List[Tuple[int, int, int]]:
+        """Sorted ``(start, pattern_index, end)`` of anchored matches at or after ``pos``"""
+        ends: Dict[Tuple[int, int], Optional[int]] = {}
+        for start, index in self._starts(text, pos):
+            if (start, index) not in ends:
+                match = self.patterns[index].pattern.match(text, start)
+                ends[start, index] = match.end() if match else None
+        return sorted(
+            (start, index, end) for (start, index), end in ends.items() if end is not None
+        )
+
+    def first(self, text: str) -> Optional[Tuple[int, int, int]]:
+        """The first anchored match found, in anchor order rather than leftmost"""
+        for start, index in self._starts(text, 0):
+            match = self.patterns[index].pattern.match(text, start)
+            if match:
+                return start, index, match.end()
+        return None
+
+    def _starts(self, text: str, pos: int) -> Iterator[Tuple[int, int]]:
+        """``(start, pattern_index)`` pairs worth trying, anchor by anchor"""
+        # Folding keeps offsets aligned with ``text`` (see _fold_case)
+        folded = text.lower() if text.isascii() else _fold_case(text)
+        for literal, indices in self.literals.items():
+            hit = folded.find(literal, pos)
+            while hit >= 0:
+                for index in indices:
+                    window = self.patterns[index].anchor_window
+                    for start in range(max(pos, hit - window), hit + 1):
+                        yield start, index
+                hit = folded.find(literal, hit + 1)
+
+
+def _top_level_branches(source: str) -> List[str]:
+    """Split a regex source on its top-level ``|`` operators"""
+    branches = []
+    depth = 0
+    start = 0
+    in_class = False
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+            # A "]" directly after "[" or "[^" is a literal, not the end of the class
+            if source[i + 1 : i + 2] == "^":
+                i += 1
+            if source[i + 1 : i + 2] == "]":
+                i += 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            branches.append(source[start:i])
+            start = i + 1
+        i += 1
+    branches.append(source[start:])
+    return branches
+
+
+def _group_map(regex: Optional["re.Pattern"], indices: List[int]) -> Dict[int, int]:
+    """Map a combined regex's group numbers back to pattern indices"""
+    if regex is None:
+        return {}
+    return {regex.groupindex[f"_pii{i}"]: i for i in indices}
+
+
+def _disjoint(
+    search: Callable[[int], Optional[Tuple[int, int, int]]], pos: int
+) -> Iterator[Tuple[int, int, int]]:
+    """Disjoint spans covering every leftmost-first match found by ``search``
+
+    ``search(position)`` returns the first ``(start, end, index)`` match at or
+    after ``position``, which only ever grows. Every match starting inside
+    an accepted one is looked at: those wholly inside it are dropped, and the
+    first of another pattern that ends past it (a card number whose first
+    digits were swallowed by the greedy tail of an API key) cuts the accepted
+    span short at its start and is accepted next, so no part of either is
+    left in clear. Matches of the same pattern never overlap, as with
+    ``re.finditer``.
+    """
+    found = search(pos)
+    while found is not None:
+        start, end, index = found
+        found = search(start + 1)
+        while found is not None and found[0] < end and (found[1] <= end or found[2] == index):
+            found = search(found[0] + 1)
+        if found is not None and found[0] < end:
+            end = found[0]
+        yield start, end, index
+
+
+class CompiledPatternSet:
+    """A list of PIIPatterns merged into a single alternation.
+
+    Each pattern becomes a named group of one combined regex, so a string is
+    scanned once no matter how many patterns there are. Spans are collected
+    from the original text, so no pattern ever sees another's replacement,
+    and the output is built with a single join. Matches are taken
+    leftmost-first; when several patterns match at the same offset, the one
+    with the highest ``priority`` wins (then the one listed first).
+    ``patterns`` holds the patterns in that order. A match of another
+    pattern that starts inside an accepted one and ends past it cuts the
+    accepted span short and is replaced too, so spans never overlap and
+    every character of either match is redacted.
+
+    Patterns that cannot be merged safely (backreferences, mixed flags) make
+    the set fall back to running each pattern sequentially.
+
+    ``candidates`` and ``subset`` implement the prefilter: patterns whose
+    hints rule them out for a given string are left out of its alternation.
+    Patterns with ``anchors`` are matched through an AnchorIndex instead and
+    merged into the scan with the same leftmost-first rule. So are patterns
+    with a ``digit_window``: they are combined into a separate numeric regex
+    that only searches the windows around clusters of digits, which lets
+    prose with few numbers skip nearly all of their work.
+    """
+
+    # Below this length the anchor and digit-window lookups cost more than
+    # the single combined scan
+    ANCHOR_MIN_LENGTH = 128
+
+    def __init__(self, patterns: List[PIIPattern]):
+        # The alternation tries patterns in list order, and indices everywhere
+        # (spans, candidates, subsets) refer to this sorted list
+        self.patterns = sorted(patterns, key=lambda p: -p.priority)
+        self.pattern_names = tuple(p.name for p in self.patterns)
+        self.all_indices = tuple(range(len(self.patterns)))
+        self._filtered = any(p.has_prefilter for p in self.patterns)
+        # Each distinct literal, char and digit-run length is checked once per
+        # string; the resulting tuple of booleans maps to a cached index tuple.
+        needles = []
+        for p in self.patterns:
+            needles.extend(n for n in p.literals + tuple(p.chars) if n not in needles)
+        self._needles = tuple(needles)
+        self._run_lengths = tuple(sorted({p.min_digit_run for p in self.patterns} - {0}))
+        self._run_needles = [b"0" * n for n in self._run_lengths]
+        self._no_runs = [False] * len(self._run_lengths)
+        self._by_outcome: Dict[Tuple[bool, ...], Tuple[int, ...]] = {}
+        self._subsets: Dict[Tuple[int, ...], "CompiledPatternSet"] = {self.all_indices: self}
+        self._literal_replacements = [
+            None if "\\" in p.replacement else p.replacement for p in self.patterns
+        ]
+        indexed = list(enumerate(self.patterns))
+        anchored = [(i, p) for i, p in indexed if p.anchors]
+        numeric = [(i, p) for i, p in indexed if not p.anchors and p.digit_window is not None]
+        scanned = [(i, p) for i, p in indexed if not p.anchors and p.digit_window is None]
+        # Short strings use one alternation over every pattern; looking up
+        # anchors and digits only pays off once there is enough text to skip.
+        self._full_regex = self._combine(indexed)
+        self.regex = self._combine(scanned) if anchored or numeric else self._full_regex
+        self.anchor_index = AnchorIndex(anchored) if anchored else None
+        self.numeric_regex = self._combine(numeric)
+        self.digit_window = max((p.digit_window for _, p in numeric), default=0)
+        # Unmergeable sets scan every pattern, anchored or not, in the fallback
+        # (as must a set whose numeric patterns cannot be combined on their own)
+        self._mergeable = self._full_regex is not None and (
+            self.numeric_regex is not None or not numeric
+        )
+        self._full_groups = _group_map(self._full_regex, [i for i, _ in indexed])
+        self._scan_groups = _group_map(self.regex, [i for i, _ in scanned])
+        self._numeric_groups = _group_map(self.numeric_regex, [i for i, _ in numeric])
+
+    @staticmethod
+    def _combine(indexed_patterns: List[Tuple[int, PIIPattern]]) -> Optional["re.Pattern"]:
+        if not indexed_patterns:
+            return None
+        indices = [i for i, _ in indexed_patterns]
+        patterns = [p for _, p in indexed_patterns]
+        flags = {p.pattern.flags for p in patterns}
+        if len(flags) != 1:
+            return None
+        sources = [p.pattern.pattern for p in patterns]
+        if any(_BACKREFERENCE.search(source) for source in sources):
+            return None
+
+        # Every built-in pattern starts with \b. Hoisting that check in front
+        # of the alternation means the other branches are only tried at word
+        # boundaries, which is where most of the single-pass speedup comes from.
+        flag = flags.pop()
+        branch_lists = [_top_level_branches(source) for source in sources]
+        hoist = not flag & re.VERBOSE and all(
+            branch.startswith(r"\b") for branches in branch_lists for branch in branches
+        )
+        if hoist:
+            sources = ["|".join(branch[2:] for branch in branches) for branches in branch_lists]
+
+        body = "|".join(f"(?P<_pii{i}>{source})" for i, source in zip(indices, sources))
+        try:
+            return re.compile(rf"\b(?:{body})" if hoist else body, flag)
+        except re.error:
+            return None
+
+    def candidates(self, text: str) -> Tuple[int, ...]:
+        """Indices of the patterns whose prefilter hints allow a match in ``text``"""
+        if not self._filtered:
+            return self.all_indices
+        if text.isascii():
+            folded = text.lower()
+            digits = text.encode("ascii").translate(_DIGIT_MASK)
+            if b"0" in digits:
+                runs = [run in digits for run in self._run_needles]
+            else:
+                runs = self._no_runs
+        else:
+            folded = _fold_case(text)
+            runs = [_digit_run_regex(n).search(text) is not None for n in self._run_lengths]
+        outcome = tuple([needle in folded for needle in self._needles] + runs)
+        indices = self._by_outcome.get(outcome)
+        if indices is None:
+            # Never evicted, so a racing thread at worst resolves it twice
+            indices = self._by_outcome.setdefault(outcome, self._resolve(outcome))
+        return indices
+
+    def _resolve(self, outcome: Tuple[bool, ...]) -> Tuple[int, ...]:
+        needles = dict(zip(self._needles, outcome))
+        runs = dict(zip(self._run_lengths, outcome[len(self._needles) :]))
+        result = []
+        for i, pattern in enumerate(self.patterns):
+            if pattern.literals and not any(needles[lit] for lit in pattern.literals):
+                continue
+            if pattern.chars and not any(needles[char] for char in pattern.chars):
+                continue
+            if pattern.min_digit_run and not runs[pattern.min_digit_run]:
+                continue
+            result.append(i)
+        return tuple(result)
+
+    def subset(self, indices: Tuple[int, ...]) -> "CompiledPatternSet":
+        """The compiled set restricted to ``indices``, built once per distinct subset"""
+        compiled = self._subsets.get(indices)
+        if compiled is None:
+            # setdefault keeps whichever set a racing thread stored first
+            compiled = CompiledPatternSet([self.patterns[i] for i in indices])
+            compiled = self._subsets.setdefault(indices, compiled)
+        return compiled
+
+    def spans(self, text: str, pos: int = 0) -> Iterator[Tuple[int, int, int]]:
+        """Yield ``(start, end, pattern_index)`` for every match in one scan
+
+        Scanning starts at ``pos``; the text before it is only used as context
+        for lookbehind assertions such as ``\\b``.
+        """
+        if not self._mergeable:
+            yield from _disjoint(self._fallback_search(text, pos), pos)
+            return
+        regex = self._full_regex
+        group_to_pattern = self._full_groups
+        split = self.anchor_index is not None or self.numeric_regex is not None
+        if split and len(text) - pos >= self.ANCHOR_MIN_LENGTH:
+            anchored = self.anchor_index.matches(text, pos) if self.anchor_index else []
+            windows = self.digit_windows(text, pos) if self.numeric_regex else []
+            if anchored or windows:
+                yield from _disjoint(self._merged_search(text, anchored, windows, pos), pos)
+                return
+            regex = self.regex
+            group_to_pattern = self._scan_groups
+            if regex is None:
+                return
+
+        def search(position):
+            match = regex.search(text, position)
+            if match is None:
+                return None
+            return match.start(), match.end(), group_to_pattern[match.lastindex]
+
+        yield from _disjoint(search, pos)
+
+    def digit_windows(self, text: str, pos: int = 0) -> List[Tuple[int, int]]:
+        """Sorted, disjoint ``(start, end)`` ranges holding every numeric match"""
+        gap = self.digit_window
+        windows: List[Tuple[int, int]] = []
+        for cluster in _digit_cluster_regex(max(gap, 1)).finditer(text, pos):
+            start = max(pos, cluster.start() - gap)
+            if windows and start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], cluster.end())
+            else:
+                windows.append((start, cluster.end()))
+        return windows
+
+    def first_match(self, text: str) -> Optional[Tuple[int, int, int]]:
+        """Any one ``(start, end, pattern_index)`` match in ``text``, or None
+
+        For yes/no checks: the cheapest lookups go first (anchor literals,
+        then the windows around digits, then the combined scan), and each
+        stops at its first hit, so the match found is not necessarily the
+        leftmost one.
+        """
+        if not self._mergeable:
+            for i, pattern in enumerate(self.patterns):
+                match = pattern.pattern.search(text)
+                if match:
+                    return match.start(), match.end(), i
+            return None
+        if len(text) < self.ANCHOR_MIN_LENGTH:
+            match = self._full_regex.search(text)
+            return (
+                (match.start(), match.end(), self._full_groups[match.lastindex]) if match else None
+            )
+        if self.anchor_index is not None:
+            found = self.anchor_index.first(text)
+            if found is not None:
+                start, index, end = found
+                return start, end, index
+        if self.numeric_regex is not None:
+            gap = self.digit_window
+            for cluster in _digit_cluster_regex(max(gap, 1)).finditer(text):
+                start = max(0, cluster.start() - gap)
+                match = self.numeric_regex.search(text, start, cluster.end())
+                if match:
+                    return match.start(), match.end(), self._numeric_groups[match.lastindex]
+        if self.regex is not None:
+            match = self.regex.search(text)
+            if match:
+                return match.start(), match.end(), self._scan_groups[match.lastindex]
+        return None
+
+    def _merged_search(
+        self,
+        text: str,
+        anchored: List[Tuple[int, int, int]],
+        windows: List[Tuple[int, int]],
+        pos: int,
+    ) -> Callable[[int], Optional[Tuple[int, int, int]]]:
+        # Interleave the combined scan with the anchored and windowed numeric
+        # matches exactly as if those patterns were extra branches of the
+        # alternation: the leftmost match wins and ties go to the earlier
+        # pattern. Positions passed to search() only ever grow.
+        regex = self.regex
+        group_to_pattern = self._scan_groups
+        numeric_groups = self._numeric_groups
+        k = 0
+        w = 0
+
+        def search_windows(position):
+            nonlocal w
+            while w < len(windows):
+                start, end = windows[w]
+                if end > position:
+                    match = self.numeric_regex.search(text, max(start, position), end)
+                    if match is not None:
+                        return match
+                w += 1
+            return None
+
+        scanned = regex.search(text, pos) if regex is not None else None
+        numbered = search_windows(pos)
+
+        def search(position):
+            nonlocal k, scanned, numbered
+            while k < len(anchored) and anchored[k][0] < position:
+                k += 1
+            if scanned is not None and scanned.start() < position:
+                scanned = regex.search(text, position)
+            if numbered is not None and numbered.start() < position:
+                numbered = search_windows(position)
+            best = anchored[k] if k < len(anchored) else None
+            if scanned is not None:
+                key = (scanned.start(), group_to_pattern[scanned.lastindex], scanned.end())
+                if best is None or key[:2] < best[:2]:
+                    best = key
+            if numbered is not None:
+                key = (numbered.start(), numeric_groups[numbered.lastindex], numbered.end())
+                if best is None or key[:2] < best[:2]:
+                    best = key
+            if best is None:
+                return None
+            start, index, end = best
+            return start, end, index
+
+        return search
+
+    def _fallback_search(
+        self, text: str, pos: int
+    ) -> Callable[[int], Optional[Tuple[int, int, int]]]:
+        # Only reached for unmergeable pattern sets: resolve the per-pattern
+        # matches with the same leftmost-first, earliest-pattern-wins rule.
+        candidates = []
+        for i, pattern in enumerate(self.patterns):
+            for match in pattern.pattern.finditer(text, pos):
+                candidates.append((match.start(), i, match.end()))
+        candidates.sort()
+        k = 0
+
+        def search(position):
+            nonlocal k
+            while k < len(candidates) and candidates[k][0] < position:
+                k += 1
+            if k == len(candidates):
+                return None
+            start, i, end = candidates[k]
+            return start, end, i
+
+        return search
+
+    def redact(self, text: str) -> str:
+        """Replace every match in ``text`` with its pattern's replacement"""
+        return self.render(text, self.spans(text))
+
+    def render(
+        self,
+        text: str,
+        spans: Iterable[Tuple[int, int, int]],
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> str:
+        """Build ``text[start:end]`` with ``spans`` (from ``spans()``) replaced
+
+        Spans reaching outside ``start``/``end`` are clipped, so the visible
+        part of a match is still replaced rather than passed through.
+        """
+        if end is None:
+            end = len(text)
+        parts = []
+        last = start
+        for span_start, span_end, i in spans:
+            if span_end <= start or span_start >= end:
+                continue
+            parts.append(text[last : max(span_start, start)])
+            parts.append(self._replacement(text, span_start, i))
+            last = min(span_end, end)
+        if not parts:
+            return text if start == 0 and end == len(text) else text[start:end]
+        parts.append(text[last:end])
+        return "".join(parts)
+
+    def _replacement(self, text: str, start: int, index: int) -> str:
+        literal = self._literal_replacements[index]
+        if literal is not None:
+            return literal
+        # Replacement templates with group references or escapes are expanded
+        # exactly as re.sub would, against the pattern's own match.
+        pattern = self.patterns[index]
+        return pattern.pattern.match(text, start).expand(pattern.replacement)
+
+
+_PATTERN_SET_CACHE_SIZE = 64
+_PATTERN_SET_CACHE: Dict[tuple, CompiledPatternSet] = {}
+# Guards inserts into the module-level caches
+_CACHE_LOCK = threading.Lock()
+
+
+def _pattern_key(p: PIIPattern) -> tuple:
+    regex = p.pattern
+    hints = (p.literals, p.chars, p.min_digit_run, p.anchors, p.anchor_window, p.digit_window)
+    return (p.name, regex.pattern, regex.flags, p.replacement, p.priority) + hints
+
+
+def _time_patterns(engine: CompiledPatternSet, text: str) -> List[float]:
+    """Seconds each of ``engine``'s patterns takes to scan ``text`` on its own"""
+    timings = []
+    for p in engine.patterns:
+        started = time.perf_counter()
+        for _ in p.pattern.finditer(text):
+            pass
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def compile_pattern_set(patterns: List[PIIPattern]) -> CompiledPatternSet:
+    """Return a CompiledPatternSet for ``patterns``, reusing one built earlier"""
+    key = tuple(_pattern_key(p) for p in patterns)
+    compiled = _PATTERN_SET_CACHE.get(key)
+    if compiled is None:
+        compiled = CompiledPatternSet(patterns)
+        remember(_PATTERN_SET_CACHE, _CACHE_LOCK, key, compiled, _PATTERN_SET_CACHE_SIZE)
+    return compiled
+
+
+# Policy.pii_fields names whose patterns are named differently
+FIELD_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "wallet": ("btc_address", "eth_address"),
+    "ip": ("ip_address",),
+}
+
+_POLICY_REDACTORS: Dict[tuple, "EnhancedPIIRedactor"] = {}
 
 
 class EnhancedPIIRedactor:
     """Advanced PII redaction with support for multiple sensitive data types"""
 
-    # Define patterns for various PII types
+    # Define patterns for various PII types. Priorities favour the most
+    # specific formats when two matches start at the same offset: emails
+    # first (their local part may itself look like a token or an SSN, and the
+    # email is then the longer match), then exact token formats, card numbers
+    # and SSNs, other credentials, and the looser numeric formats.
     PATTERNS = [
-        # Email addresses
-        PIIPattern("email", r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", "[EMAIL]"),
+        # Email addresses (parts bounded by the RFC 5321 limits, which keeps
+        # matching linear on long runs of address characters)
+        PIIPattern(
+            "email",
+            r"\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,255}\.[A-Z|a-z]{2,63}\b",
+            "[EMAIL]",
+            chars="@",
+            priority=50,
+        ),
         # US Social Security Numbers (SSN)
-        PIIPattern("ssn", r"\b\d{3}-\d{2}-\d{4}\b|\b\d{9}\b", "[SSN]"),
+        PIIPattern(
+            "ssn",
+            r"\b\d{3}-\d{2}-\d{4}\b|\b\d{9}\b",
+            "[SSN]",
+            min_digit_run=3,
+            digit_window=1,
+            priority=30,
+        ),
         # Credit card numbers (major issuers)
-        PIIPattern("credit_card", r"\b(?:\d{4}[-\s]?){3}\d{4}\b", "[CREDIT_CARD]"),
+        PIIPattern(
+            "credit_card",
+            r"\b(?:\d{4}[-\s]?){3}\d{4}\b",
+            "[CREDIT_CARD]",
+            min_digit_run=4,
+            digit_window=1,
+            priority=30,
+        ),
         # Phone numbers (US format)
         PIIPattern(
             "phone",
             r"\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b",
             "[PHONE]",
+            min_digit_run=4,
+            digit_window=2,
+            priority=10,
         ),
         # IP addresses (IPv4)
-        PIIPattern("ip_address", r"\b(?:\d{1,3}\.){3}\d{1,3}\b", "[IP_ADDRESS]"),
+        PIIPattern(
+            "ip_address",
+            r"\b(?:\d{1,3}\.){3}\d{1,3}\b",
+            "[IP_ADDRESS]",
+            chars=".",
+            min_digit_run=1,
+            digit_window=1,
+            priority=10,
+        ),
         # API keys and tokens (common patterns)
         PIIPattern(
             "api_key",
             r'\b(?:api[_-]?key|apikey|access[_-]?token|secret[_-]?key)["\s:=]+([A-Za-z0-9_\-]{20,})\b',
             "[API_KEY]",
+            anchors=["api", "access", "secret"],
+            priority=20,
         ),
         # AWS Access Keys
-        PIIPattern("aws_key", r"\b(AKIA[0-9A-Z]{16})\b", "[AWS_KEY]"),
+        PIIPattern(
+            "aws_key", r"\b(AKIA[0-9A-Z]{16})\b", "[AWS_KEY]", anchors=["akia"], priority=40
+        ),
         # GitHub tokens (fixed pattern - 36+ chars after prefix)
         PIIPattern(
             "github_token",
             r"\b(ghp_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{82})\b",
             "[GITHUB_TOKEN]",
+            anchors=["ghp_", "github_pat_"],
+            priority=40,
         ),
         # Generic secrets (Bearer tokens, etc)
-        PIIPattern("bearer_token", r"\bBearer\s+([A-Za-z0-9\-._~+/]+=*)\b", "Bearer [TOKEN]"),
+        PIIPattern(
+            "bearer_token",
+            r"\bBearer\s+([A-Za-z0-9\-._~+/]+=*)\b",
+            "Bearer [TOKEN]",
+            anchors=["bearer"],
+            priority=20,
+        ),
         # Cryptocurrency addresses (Bitcoin)
-        PIIPattern("btc_address", r"\b[13][a-km-zA-HJ-NP-Z1-9]{25,34}\b", "[BTC_ADDRESS]"),
+        PIIPattern(
+            "btc_address",
+            r"\b[13][a-km-zA-HJ-NP-Z1-9]{25,34}\b",
+            "[BTC_ADDRESS]",
+            chars="13",
+            priority=10,
+        ),
         # Ethereum addresses (fixed - needs 0x prefix + 40 hex chars)
-        PIIPattern("eth_address", r"\b0x[a-fA-F0-9]{40}\b", "[ETH_ADDRESS]"),
+        PIIPattern(
+            "eth_address", r"\b0x[a-fA-F0-9]{40}\b", "[ETH_ADDRESS]", anchors=["0x"], priority=40
+        ),
         # US Passport numbers
-        PIIPattern("passport", r"\b[A-Z]{1,2}\d{6,9}\b", "[PASSPORT]"),
+        PIIPattern(
+            "passport",
+            r"\b[A-Z]{1,2}\d{6,9}\b",
+            "[PASSPORT]",
+            min_digit_run=6,
+            digit_window=2,
+            priority=10,
+        ),
         # Driver's license (varies by state, this is a general pattern)
-        PIIPattern("drivers_license", r"\b[A-Z]{1,2}\d{5,8}\b", "[DRIVERS_LICENSE]"),
+        PIIPattern(
+            "drivers_license",
+            r"\b[A-Z]{1,2}\d{5,8}\b",
+            "[DRIVERS_LICENSE]",
+            min_digit_run=5,
+            digit_window=2,
+        ),
     ]
 
-    def __init__(self, custom_patterns: List[PIIPattern] = None):
-        """Initialize with default patterns plus any custom ones"""
-        self.patterns = self.PATTERNS.copy()
-        if custom_patterns:
-            self.patterns.extend(custom_patterns)
+    # Below this length the pre-scan costs more than the patterns it would skip
+    PREFILTER_MIN_LENGTH = 16
+
+    # redact_many() batches smaller than this are not worth starting processes
+    PARALLEL_MIN_BYTES = 1024 * 1024
+    # Smallest amount of text sent to a worker in one task
+    CHUNK_MIN_BYTES = 64 * 1024
+
+    # Joins a column's values in redact_column(); not a word, digit or space
+    COLUMN_SEPARATOR = "\x00"
+
+    def __init__(
+        self,
+        custom_patterns: List[PIIPattern] = None,
+        prefilter: bool = True,
+        cache: Optional[RedactionCache] = None,
+        enabled: Optional[Iterable[str]] = None,
+        time_budget: Optional[float] = None,
+        profiler: Optional[PatternProfiler] = None,
+    ):
+        """Initialize with default patterns plus any custom ones
+
+        ``enabled`` restricts the default patterns to those with the given
+        names; custom patterns are always used.
+
+        With ``prefilter`` enabled (the default), each string is first checked
+        against the patterns' prefilter hints and only patterns that could
+        match are run. ``prefilter_stats()`` reports how often each was skipped.
+
+        ``cache`` memoizes redacted strings; it may be shared between redactors.
+
+        ``time_budget`` (seconds) enables guard mode: once scanning a string
+        takes longer, the matches found so far are kept and every digit in
+        the rest of the string is masked instead. The budget is checked
+        between matches, since a single regex search cannot be interrupted.
+
+        ``profiler`` opts in to per-pattern match and volume counters, and
+        to timing each pattern on a sample of the strings redacted.
+        """
+        self.enabled = None if enabled is None else frozenset(enabled)
+        self.custom_patterns = list(custom_patterns or [])
+        self.patterns = [p for p in self.PATTERNS if self.enabled is None or p.name in self.enabled]
+        self.patterns.extend(self.custom_patterns)
+        self.prefilter = prefilter
+        self.cache = cache
+        self.time_budget = time_budget
+        self.profiler = profiler
+        self.budget_exceeded = 0
+        self._engine = compile_pattern_set(self.patterns)
+        # Strings seen per candidate subset; per-pattern skips are derived on read
+        self._candidate_counts: Dict[Tuple[int, ...], int] = {}
+        self._counts_lock = threading.Lock()
+        # Whether redact_column() may scan a joined column; worked out on first use
+        self._column_joinable: Optional[bool] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sent to worker processes without the cache and profiler, which are
+        # per-process, and without the compiled engine, which is rebuilt there
+        state = self.__dict__.copy()
+        for name in ("cache", "profiler", "_engine", "_candidate_counts", "_counts_lock"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.cache = None
+        self.profiler = None
+        self._engine = compile_pattern_set(self.patterns)
+        self._candidate_counts = {}
+        self._counts_lock = threading.Lock()
+
+    @classmethod
+    def for_policy(
+        cls,
+        policy: Any,
+        cache: Optional[RedactionCache] = None,
+        profiler: Optional[PatternProfiler] = None,
+    ) -> "EnhancedPIIRedactor":
+        """Redactor running only the patterns enabled by ``policy.pii_fields``
+
+        Field names are mapped through FIELD_PATTERNS (``wallet`` covers the
+        BTC and ETH patterns) or else match pattern names directly. Redactors
+        are shared between policies with the same fields, cache and profiler.
+        """
+        enabled = set()
+        for field in policy.pii_fields:
+            field = field.lower()
+            enabled.update(FIELD_PATTERNS.get(field, (field,)))
+        key = (cls, frozenset(enabled), cache, profiler)
+        redactor = _POLICY_REDACTORS.get(key)
+        if redactor is None:
+            redactor = cls(cache=cache, enabled=enabled, profiler=profiler)
+            remember(_POLICY_REDACTORS, _CACHE_LOCK, key, redactor, _PATTERN_SET_CACHE_SIZE)
+        return redactor
 
     def redact(self, data: Any) -> Any:
-        """Recursively redact PII from data structures"""
-        if isinstance(data, str):
-            return self._redact_string(data)
-        elif isinstance(data, dict):
-            return {k: self.redact(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self.redact(item) for item in data]
-        elif isinstance(data, tuple):
-            return tuple(self.redact(item) for item in data)
-        return data
+        """Redact PII from data structures
+
+        Containers are only copied along paths where a string changed;
+        anything without PII is returned as the same object.
+        """
+        return transform(data, self._redact_leaf)
+
+    def redact_many(self, items: Iterable[Any], workers: Optional[int] = None) -> List[Any]:
+        """Redact a batch of items, in parallel worker processes if it is large
+
+        Regex matching holds the GIL, so big batches are split over
+        ``workers`` processes (default: one per CPU). Each worker builds the
+        pattern set once at startup; items are sent in chunks of roughly
+        equal text size and results come back in input order. Batches under
+        PARALLEL_MIN_BYTES, or ``workers=1``, are redacted in this process.
+
+        Workers do not use this redactor's cache or update its prefilter stats.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        items = list(items)
+        workers = workers or os.cpu_count() or 1
+        sizes = [text_size(item) for item in items]
+        total = sum(sizes)
+        if workers <= 1 or len(items) <= 1 or total < self.PARALLEL_MIN_BYTES:
+            return [self.redact(item) for item in items]
+
+        # A few chunks per worker keeps them busy when item sizes are uneven
+        target = max(self.CHUNK_MIN_BYTES, total // (workers * 4))
+        chunks = []
+        chunk: List[Any] = []
+        chunk_size = 0
+        for item, size in zip(items, sizes):
+            chunk.append(item)
+            chunk_size += size
+            if chunk_size >= target:
+                chunks.append(chunk)
+                chunk, chunk_size = [], 0
+        if chunk:
+            chunks.append(chunk)
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_init_worker,
+            initargs=(
+                type(self),
+                self.custom_patterns,
+                self.prefilter,
+                self.enabled,
+                self.time_budget,
+            ),
+        ) as pool:
+            results = []
+            for redacted in pool.map(_redact_chunk, chunks):
+                results.extend(redacted)
+        return results
+
+    def redact_records(self, records: Iterable[Any]) -> List[Any]:
+        """Redact a batch of uniform records (dicts with the same keys) column by column
+
+        The string values under each key are redacted together with
+        ``redact_column``, so the patterns run once per column instead of
+        once per value; nested values are redacted with ``redact``. The
+        result equals ``[self.redact(r) for r in records]``.
+        """
+        return transform_columns(list(records), self.redact_column, self.redact)
+
+    def redact_column(self, values: List[str]) -> List[str]:
+        """Redact a list of strings with a single scan of their concatenation
+
+        Values are joined with COLUMN_SEPARATOR, which no built-in pattern
+        can match, and split again after redaction. Columns whose values
+        contain the separator are redacted value by value instead, as are all
+        columns when a (custom) pattern could match the separator, anchors to
+        the start or end of a string, or looks behind: joining would change
+        what it matches. The cache is not used, and in guard mode the time
+        budget covers the whole column.
+        """
+        separator = self.COLUMN_SEPARATOR
+        if self._column_joinable is None:
+            from .sharding import separates
+
+            self._column_joinable = separates(self.patterns, separator)
+        if len(values) < 2 or not self._column_joinable:
+            return [self._redact_string(value) for value in values]
+        joined = separator.join(values)
+        if joined.count(separator) == len(values) - 1:
+            redacted = self._redact_uncached(joined)[0]
+            if redacted is joined:
+                return list(values)
+            parts = redacted.split(separator)
+            if len(parts) == len(values):
+                return [value if part == value else part for value, part in zip(values, parts)]
+        return [self._redact_string(value) for value in values]
+
+    def redact_file(
+        self,
+        source: Union[str, "os.PathLike[str]"],
+        destination: Union[str, "os.PathLike[str]"],
+        encoding: str = "utf-8",
+        chunk_size: int = 1024 * 1024,
+        max_holdback: int = 4096,
+    ) -> Dict[str, int]:
+        """Redact a text file into ``destination`` and return match counts by pattern
+
+        The source is memory-mapped and decoded ``chunk_size`` bytes at a
+        time; each chunk goes through a StreamingRedactor, which carries the
+        tail that could still grow into a match over to the next chunk, and
+        the redacted text is written out as soon as it is released. Memory
+        use depends on ``chunk_size`` and ``max_holdback``, not on the file
+        size. Line endings and all other text are written back unchanged.
+
+        A single match longer than ``max_holdback`` characters is cut at that
+        length, as in StreamingRedactor.
+        """
+        from .streaming import StreamingRedactor
+
+        stream = StreamingRedactor(self, max_holdback=max_holdback)
+        decoder = codecs.getincrementaldecoder(encoding)()
+        with (
+            open(source, "rb") as src,
+            open(destination, "w", encoding=encoding, newline="") as dst,
+        ):
+            size = os.fstat(src.fileno()).st_size
+            # Empty files cannot be mapped
+            if size:
+                with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    released = 0
+                    for position in range(0, size, chunk_size):
+                        chunk = decoder.decode(data[position : position + chunk_size])
+                        dst.write(stream.feed(chunk))
+                        # Drop the pages already read from this process's
+                        # resident set, so it does not grow with the file
+                        done = min(position + chunk_size, size) // mmap.PAGESIZE * mmap.PAGESIZE
+                        if _MADV_DONTNEED is not None and done > released:
+                            data.madvise(_MADV_DONTNEED, released, done - released)
+                            released = done
+            dst.write(stream.feed(decoder.decode(b"", final=True)))
+            dst.write(stream.flush())
+        return stream.counts
+
+    def _redact_leaf(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._redact_string(value)
+        return value
 
     def _redact_string(self, text: str) -> str:
-        """Apply all PII patterns to a string"""
+        """Apply all PII patterns to a string in a single scan"""
+        cache = self.cache
+        if cache is None or len(text) < cache.min_length:
+            return self._redact_uncached(text)[0]
+        # Keyed by the compiled pattern set so redactors with different
+        # patterns can share one cache
+        key = (self._engine, text)
+        redacted = cache.get(key)
+        if redacted is None:
+            redacted, complete = self._redact_uncached(text)
+            # Guard-mode fallback output depends on timing, so it is never cached
+            if complete:
+                cache.put(key, text, redacted)
+        elif redacted == text:
+            # Hand back the caller's own object so unchanged containers are reused
+            return text
+        return redacted
+
+    def _redact_uncached(self, text: str) -> Tuple[str, bool]:
+        """Redact ``text``; the flag is False if the guard fell back to masking"""
+        engine = self._select_engine(text)
+        if self.time_budget is None and self.profiler is None:
+            return engine.redact(text), True
+        started = time.perf_counter()
+        deadline = None if self.time_budget is None else started + self.time_budget
+        spans = []
+        complete = True
+        for span in engine.spans(text):
+            spans.append(span)
+            if deadline is not None and time.perf_counter() > deadline:
+                self.budget_exceeded += 1
+                complete = False
+                break
+        if self.profiler is not None:
+            timings = _time_patterns(engine, text) if self.profiler.sample() else None
+            self.profiler.record(engine.pattern_names, len(text), spans, timings)
+        if not complete:
+            end = spans[-1][1]
+            return engine.render(text, spans, 0, end) + _DIGIT.sub("#", text[end:]), False
+        return engine.render(text, spans), True
+
+    def _select_engine(self, text: str) -> CompiledPatternSet:
+        if not self.prefilter or len(text) < self.PREFILTER_MIN_LENGTH:
+            return self._engine
+        indices = self._engine.candidates(text)
+        with self._counts_lock:
+            self._candidate_counts[indices] = self._candidate_counts.get(indices, 0) + 1
+        return self._engine.subset(indices)
+
+    def prefilter_stats(self) -> Dict[str, Any]:
+        """Number of strings prefiltered and how many times each pattern was skipped"""
+        skipped = {pattern.name: 0 for pattern in self.patterns}
+        strings = 0
+        with self._counts_lock:
+            counts = list(self._candidate_counts.items())
+        for indices, count in counts:
+            strings += count
+            ran = set(indices)
+            for i, pattern in enumerate(self._engine.patterns):
+                if i not in ran:
+                    skipped[pattern.name] += count
+        return {"strings": strings, "skipped": skipped}
+
+    def _redact_string_sequential(self, text: str) -> str:
+        """Apply each PII pattern in turn (reference path for benchmarks)"""
         result = text
-        for pattern in self.patterns:
+        for pattern in self._engine.patterns:
             result = pattern.pattern.sub(pattern.replacement, result)
         return result
 
+    def scan_spans(self, data: Any) -> List[PIISpan]:
+        """Locate PII in data structures without redacting or copying any text"""
+        spans: List[PIISpan] = []
+        transform(data, lambda value, path: self._scan_leaf(value, path, spans, False), paths=True)
+        return spans
+
+    def redact_with_spans(self, data: Any) -> Tuple[Any, List[PIISpan]]:
+        """Redact data and report where PII was found, from the same single scan"""
+        spans: List[PIISpan] = []
+        redacted = transform(
+            data, lambda value, path: self._scan_leaf(value, path, spans, True), paths=True
+        )
+        return redacted, spans
+
+    def _scan_leaf(self, value: Any, path: tuple, out: List[PIISpan], render: bool) -> Any:
+        if not isinstance(value, str):
+            return value
+        engine = self._select_engine(value)
+        spans = list(engine.spans(value))
+        if not spans:
+            return value
+        names = engine.pattern_names
+        out.extend(PIISpan(path, names[i], start, end) for start, end, i in spans)
+        return engine.render(value, spans) if render else value
+
+    def contains_pii(self, data: Any, kinds: Optional[Iterable[str]] = None) -> Optional[PIISpan]:
+        """Where the first PII found in ``data`` is, or None if there is none
+
+        Strings are checked in traversal order and the walk stops at the
+        first hit, so a payload with PII early on costs little to reject.
+        Within a string the prefilter runs first, then the most selective
+        lookups (see CompiledPatternSet.first_match); the span reported is
+        the first one found, not necessarily the leftmost.
+
+        ``kinds`` restricts the check to some patterns, by pattern name or
+        Policy.pii_fields name (see FIELD_PATTERNS).
+        """
+        engine = self._engine
+        if kinds is not None:
+            names = set()
+            for kind in kinds:
+                kind = kind.lower()
+                names.update(FIELD_PATTERNS.get(kind, (kind,)))
+            unknown = names.difference(engine.pattern_names)
+            if unknown:
+                raise ValueError(f"Unknown PII kinds: {', '.join(sorted(unknown))}")
+            engine = compile_pattern_set([p for p in engine.patterns if p.name in names])
+        for path, value in iter_leaves(data):
+            if not isinstance(value, str):
+                continue
+            scoped = engine
+            if self.prefilter and len(value) >= self.PREFILTER_MIN_LENGTH:
+                scoped = engine.subset(engine.candidates(value))
+            found = scoped.first_match(value)
+            if found is not None:
+                start, end, index = found
+                return PIISpan(path, scoped.pattern_names[index], start, end)
+        return None
+
     def scan(self, data: Any) -> Dict[str, List[str]]:
         """Scan data and return what PII types were found (without exposing values)"""
-        findings = {}
-
-        def scan_value(value: Any):
-            if isinstance(value, str):
-                for pattern in self.patterns:
-                    matches = pattern.pattern.findall(value)
-                    if matches:
-                        if pattern.name not in findings:
-                            findings[pattern.name] = []
-                        findings[pattern.name].append(f"Found {len(matches)} instance(s)")
-            elif isinstance(value, dict):
-                for v in value.values():
-                    scan_value(v)
-            elif isinstance(value, (list, tuple)):
-                for item in value:
-                    scan_value(item)
-
-        scan_value(data)
+        counts: Dict[Tuple[tuple, str], int] = {}
+        for span in self.scan_spans(data):
+            key = (span.path, span.pattern)
+            counts[key] = counts.get(key, 0) + 1
+        findings: Dict[str, List[str]] = {}
+        for (_, name), count in counts.items():
+            findings.setdefault(name, []).append(f"Found {count} instance(s)")
         return findings
 
 
+_WORKER_REDACTOR: Optional[EnhancedPIIRedactor] = None
+
+
+def _init_worker(redactor_class, custom_patterns, prefilter, enabled, time_budget):
+    global _WORKER_REDACTOR
+    _WORKER_REDACTOR = redactor_class(
+        custom_patterns, prefilter=prefilter, enabled=enabled, time_budget=time_budget
+    )
+
+
+def _redact_chunk(chunk: List[Any]) -> List[Any]:
+    return [_WORKER_REDACTOR.redact(item) for item in chunk]
+
+
 # Convenience function for quick redaction
 def redact_pii(data: Any, custom_patterns: List[PIIPattern] = None) -> Any:
     """Quick function to redact PII from any data structure"""
     redactor = EnhancedPIIRedactor(custom_patterns)
     return redactor.redact(data)
+
+
+def contains_pii(data: Any, kinds: Optional[Iterable[str]] = None) -> Optional[PIISpan]:
+    """Quick function to find whether (and where) data contains PII"""
+    return EnhancedPIIRedactor().contains_pii(data, kinds)
+
+
+def redact_file(
+    source: Union[str, "os.PathLike[str]"],
+    destination: Union[str, "os.PathLike[str]"],
+    custom_patterns: List[PIIPattern] = None,
+) -> Dict[str, int]:
+    """Quick function to redact a (possibly very large) text file to ``destination``"""
+    return EnhancedPIIRedactor(custom_patterns).redact_file(source, destination)
@@ -0,0 +1,91 @@
+"""Per-pattern profiling counters for PII redaction"""
+
+import threading
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+
+class PatternProfiler:
+    """Accumulates per-pattern statistics during redaction.
+
+    For every string it records, each pattern that ran on it gets a count
+    of its matches and the string's length added to ``chars_scanned``.
+    All patterns run in one combined pass, which cannot be timed per
+    pattern, so one string in every ``sample_every`` is scanned again by
+    each candidate pattern's own regex: that time goes to ``seconds`` and
+    the string's length to ``chars_timed``. ``seconds / chars_timed`` is a
+    pattern's cost per character; the sampled strings pay for the extra
+    scans, the others nothing.
+
+    Counters are kept in memory and handed to ``metrics.record_pii_batch()``
+    every ``flush_every`` strings (and on ``flush()``), so the metrics
+    backend is called once per batch rather than once per match.
+    """
+
+    def __init__(
+        self, metrics: Optional[Any] = None, flush_every: int = 1000, sample_every: int = 100
+    ):
+        if flush_every <= 0:
+            raise ValueError("flush_every must be positive")
+        if sample_every <= 0:
+            raise ValueError("sample_every must be positive")
+        self.metrics = metrics
+        self.flush_every = flush_every
+        self.sample_every = sample_every
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._strings = 0
+        self._seen = 0
+
+    def sample(self) -> bool:
+        """True if the next string's patterns should be timed one by one"""
+        with self._lock:
+            self._seen += 1
+            if self._seen < self.sample_every:
+                return False
+            self._seen = 0
+            return True
+
+    def record(
+        self,
+        pattern_names: Tuple[str, ...],
+        length: int,
+        spans: Iterable[Tuple[int, int, int]],
+        timings: Optional[Sequence[float]] = None,
+    ):
+        """Add one scanned string; ``spans`` and ``timings`` index into ``pattern_names``"""
+        with self._lock:
+            stats = self._stats
+            for name in pattern_names:
+                entry = stats.get(name)
+                if entry is None:
+                    entry = stats[name] = {
+                        "matches": 0,
+                        "chars_scanned": 0,
+                        "chars_timed": 0,
+                        "seconds": 0.0,
+                    }
+                entry["chars_scanned"] += length
+            for _, _, i in spans:
+                stats[pattern_names[i]]["matches"] += 1
+            if timings is not None:
+                for name, seconds in zip(pattern_names, timings):
+                    stats[name]["chars_timed"] += length
+                    stats[name]["seconds"] += seconds
+            self._strings += 1
+            due = self._strings >= self.flush_every
+        if due and self.metrics is not None:
+            self.flush()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Counters accumulated since the last flush"""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
+
+    def flush(self) -> Dict[str, Dict[str, float]]:
+        """Send accumulated counters to the metrics backend and reset them"""
+        with self._lock:
+            batch, self._stats = self._stats, {}
+            self._strings = 0
+        if batch and self.metrics is not None:
+            self.metrics.record_pii_batch(batch)
+        return batch
@@ -0,0 +1,177 @@
+"""Parallel redaction of very large single strings"""
+
+import os
+import re
+from collections import deque
+from typing import Iterator, List, Optional
+
+from . import pii_patterns
+from .pii_patterns import EnhancedPIIRedactor, PIIPattern, _init_worker
+from .streaming import _C, _REPEATS, _SINGLE_CHARS, _Unsupported, _full, _sre_parse
+
+# Shards are only cut after ASCII characters. "\n" is left out because "$"
+# matches right before a newline that ends the string.
+_CANDIDATES = "".join(chr(i) for i in range(128) if chr(i) != "\n")
+
+
+def _char_nodes(nodes) -> Iterator[list]:
+    """Every single-character node of a parsed pattern, lookarounds included"""
+    for op, av in nodes:
+        if op in _SINGLE_CHARS:
+            yield [(op, av)]
+        elif op is _C.SUBPATTERN:
+            yield from _char_nodes(av[3])
+        elif op is getattr(_C, "ATOMIC_GROUP", None):
+            yield from _char_nodes(av)
+        elif op is _C.BRANCH:
+            for branch in av[1]:
+                yield from _char_nodes(branch)
+        elif op in _REPEATS:
+            yield from _char_nodes(av[2])
+        elif op in (_C.ASSERT, _C.ASSERT_NOT):
+            yield from _char_nodes(av[1])
+        elif op is not _C.AT:
+            raise _Unsupported(op)
+
+
+def barrier_chars(patterns: List[PIIPattern]) -> str:
+    """ASCII characters that no pattern can match, even inside a lookaround
+
+    A match can never contain (or look past) one of these, so a string cut
+    right after one is redacted piece by piece exactly as it is whole.
+    Returns "" when this cannot be shown, e.g. for patterns using ``.``.
+    """
+    barriers = _CANDIDATES
+    for pattern in patterns:
+        regex = pattern.pattern
+        try:
+            nodes = list(_char_nodes(_sre_parse.parse(regex.pattern, regex.flags)))
+            sources = [_full(node) for node in nodes]
+        except _Unsupported:
+            return ""
+        if sources:
+            consumed = re.compile("|".join(sources), regex.flags & ~re.VERBOSE)
+            barriers = "".join(char for char in barriers if not consumed.fullmatch(char))
+    return barriers
+
+
+def _edge_sensitive(nodes) -> bool:
+    """True if a parsed pattern tests string edges (``^``, ``$``, ``\\A``,
+    ``\\Z``) or looks behind, which joining strings would change"""
+    for op, av in nodes:
+        if op is _C.AT and av not in (_C.AT_BOUNDARY, _C.AT_NON_BOUNDARY):
+            return True
+        if op in (_C.ASSERT, _C.ASSERT_NOT):
+            if av[0] < 0 or _edge_sensitive(av[1]):
+                return True
+        elif op is _C.SUBPATTERN:
+            if _edge_sensitive(av[3]):
+                return True
+        elif op is getattr(_C, "ATOMIC_GROUP", None):
+            if _edge_sensitive(av):
+                return True
+        elif op is _C.BRANCH:
+            if any(_edge_sensitive(branch) for branch in av[1]):
+                return True
+        elif op in _REPEATS:
+            if _edge_sensitive(av[2]):
+                return True
+    return False
+
+
+def separates(patterns: List[PIIPattern], separator: str) -> bool:
+    """True if strings joined with ``separator`` redact exactly as they do apart
+
+    The separator must be a barrier character (see ``barrier_chars``) and no
+    pattern may anchor to the start or end of the string or look behind.
+    """
+    if separator not in barrier_chars(patterns):
+        return False
+    for pattern in patterns:
+        regex = pattern.pattern
+        if _edge_sensitive(_sre_parse.parse(regex.pattern, regex.flags)):
+            return False
+    return True
+
+
+class ShardedRedactor:
+    """Redacts very large single strings (scraped pages, log dumps) in parallel.
+
+    The string is cut into shards of about ``shard_size`` characters. Every
+    cut is placed right after a barrier character, one that no pattern can
+    match (see ``barrier_chars``; for the built-in patterns these include
+    ``,`` ``;`` ``<`` ``>`` and ``#``). No match can cross a cut, so shards
+    are redacted independently, each with one character of context, and the
+    joined output is identical to redacting the string at once.
+
+    Shards go to ``workers`` processes (default: one per CPU), at most two
+    per worker at a time, so apart from the input and the output only a few
+    shards are held in memory. Strings shorter than two shards, and strings
+    or pattern sets without barrier characters, are redacted in this
+    process. Workers do not use the redactor's cache, profiler or guard mode.
+    """
+
+    def __init__(
+        self,
+        redactor: Optional[EnhancedPIIRedactor] = None,
+        workers: Optional[int] = None,
+        shard_size: int = 4 * 1024 * 1024,
+    ):
+        if shard_size <= 0:
+            raise ValueError("shard_size must be positive")
+        self.redactor = redactor or EnhancedPIIRedactor()
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.barriers = barrier_chars(self.redactor.patterns)
+        self._barrier = re.compile(f"[{re.escape(self.barriers)}]") if self.barriers else None
+
+    def cuts(self, text: str) -> List[int]:
+        """Offsets at which ``text`` is cut into shards"""
+        cuts: List[int] = []
+        if self._barrier is None:
+            return cuts
+        start = 0
+        while len(text) - start >= 2 * self.shard_size:
+            barrier = self._barrier.search(text, start + self.shard_size)
+            if barrier is None:
+                break
+            start = barrier.end()
+            cuts.append(start)
+        return cuts
+
+    def redact(self, text: str) -> str:
+        """Redact ``text``, in parallel shards when it is large enough"""
+        cuts = self.cuts(text) if self.workers > 1 else []
+        if not cuts:
+            return self.redactor._redact_string(text)
+        from concurrent.futures import ProcessPoolExecutor
+
+        bounds = [0] + cuts + [len(text)]
+        redactor = self.redactor
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(bounds) - 1),
+            initializer=_init_worker,
+            initargs=(
+                type(redactor),
+                redactor.custom_patterns,
+                redactor.prefilter,
+                redactor.enabled,
+                redactor.time_budget,
+            ),
+        ) as pool:
+            pending: deque = deque()
+            outputs = []
+            for start, end in zip(bounds, bounds[1:]):
+                if len(pending) >= 2 * self.workers:
+                    outputs.append(pending.popleft().result())
+                # The character before the cut gives \b its context
+                context = 1 if start else 0
+                pending.append(pool.submit(_redact_shard, text[start - context : end], context))
+            outputs.extend(future.result() for future in pending)
+        return "".join(outputs)
+
+
+def _redact_shard(shard: str, offset: int) -> str:
+    redactor = pii_patterns._WORKER_REDACTOR
+    engine = redactor._select_engine(shard)
+    return engine.render(shard, engine.spans(shard, offset), offset)
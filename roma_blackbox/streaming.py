@@ -0,0 +1,267 @@
+"""Incremental PII redaction for streamed text"""
+
+import re
+import weakref
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from .pii_patterns import EnhancedPIIRedactor, PIIPattern
+
+try:  # Python 3.11+
+    from re import _constants as _sre_constants, _parser as _sre_parse
+except ImportError:  # pragma: no cover - Python 3.9/3.10
+    import sre_constants as _sre_constants
+    import sre_parse as _sre_parse
+
+_C = _sre_constants
+_REPEATS = {_C.MAX_REPEAT, _C.MIN_REPEAT, getattr(_C, "POSSESSIVE_REPEAT", None)}
+_SINGLE_CHARS = {_C.LITERAL, _C.NOT_LITERAL, _C.ANY, _C.IN}
+_CATEGORIES = {
+    _C.CATEGORY_DIGIT: r"\d",
+    _C.CATEGORY_NOT_DIGIT: r"\D",
+    _C.CATEGORY_SPACE: r"\s",
+    _C.CATEGORY_NOT_SPACE: r"\S",
+    _C.CATEGORY_WORD: r"\w",
+    _C.CATEGORY_NOT_WORD: r"\W",
+}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _char(code: int) -> str:
+    return re.escape(chr(code))
+
+
+def _char_class(items) -> str:
+    parts = []
+    for op, av in items:
+        if op is _C.NEGATE:
+            parts.insert(0, "^")
+        elif op is _C.LITERAL:
+            parts.append(_char(av))
+        elif op is _C.RANGE:
+            parts.append(f"{_char(av[0])}-{_char(av[1])}")
+        elif op is _C.CATEGORY and av in _CATEGORIES:
+            parts.append(_CATEGORIES[av])
+        else:
+            raise _Unsupported(op)
+    return f"[{''.join(parts)}]"
+
+
+def _full(nodes) -> str:
+    """Regex source for ``nodes`` with assertions and group captures dropped"""
+    out = []
+    for op, av in nodes:
+        if op is _C.LITERAL:
+            out.append(_char(av))
+        elif op is _C.NOT_LITERAL:
+            out.append(f"[^{_char(av)}]")
+        elif op is _C.ANY:
+            out.append("(?s:.)")
+        elif op is _C.IN:
+            out.append(_char_class(av))
+        elif op in (_C.AT, _C.ASSERT, _C.ASSERT_NOT):
+            continue
+        elif op is _C.SUBPATTERN:
+            if av[1] or av[2]:
+                raise _Unsupported("scoped flags")
+            out.append(f"(?:{_full(av[3])})")
+        elif op is getattr(_C, "ATOMIC_GROUP", None):
+            out.append(f"(?:{_full(av)})")
+        elif op is _C.BRANCH:
+            out.append("(?:" + "|".join(_full(branch) for branch in av[1]) + ")")
+        elif op in _REPEATS:
+            low, high, item = av
+            high = "" if high is _C.MAXREPEAT else high
+            out.append(f"(?:{_full(item)}){{{low},{high}}}")
+        else:
+            raise _Unsupported(op)
+    return "".join(out)
+
+
+def _prefix(nodes) -> str:
+    """Regex source matching every prefix (including "") of a match of ``nodes``"""
+    nodes = [(op, av) for op, av in nodes if op not in (_C.AT, _C.ASSERT, _C.ASSERT_NOT)]
+    if not nodes:
+        return ""
+    (op, av), rest = nodes[0], nodes[1:]
+    if op in _SINGLE_CHARS:
+        head_full = _full([(op, av)])
+        head_prefix = f"{head_full}?"
+    elif op is _C.SUBPATTERN:
+        head_full = _full([(op, av)])
+        head_prefix = f"(?:{_prefix(av[3])})"
+    elif op is getattr(_C, "ATOMIC_GROUP", None):
+        head_full = _full([(op, av)])
+        head_prefix = f"(?:{_prefix(av)})"
+    elif op is _C.BRANCH:
+        head_full = _full([(op, av)])
+        head_prefix = "(?:" + "|".join(_prefix(branch) for branch in av[1]) + ")"
+    elif op in _REPEATS:
+        low, high, item = av
+        head_full = _full([(op, av)])
+        if high == 0:
+            head_prefix = ""
+        elif len(item) == 1 and item[0][0] in _SINGLE_CHARS:
+            # Every prefix of x{m,n} is x{0,n} when x is one character
+            bound = "" if high is _C.MAXREPEAT else high
+            head_prefix = f"(?:{_full(item)}){{0,{bound}}}"
+        else:
+            bound = "" if high is _C.MAXREPEAT else high - 1
+            head_prefix = f"(?:{_full(item)}){{0,{bound}}}(?:{_prefix(item)})"
+    else:
+        raise _Unsupported(op)
+    if not rest:
+        return head_prefix
+    return f"(?:{head_full}{_prefix(rest)}|{head_prefix})"
+
+
+class _TailDetector:
+    """Finds where the unreleased tail of a stream must start.
+
+    For every pattern, a regex for the language of its match prefixes is
+    derived from the parsed pattern (assertions such as \\b are dropped, which
+    only ever makes it hold back more). A single search anchored at the end
+    of the buffer then returns the earliest offset whose suffix could still
+    be extended into a match by text that has not arrived yet.
+    """
+
+    def __init__(self, patterns: List[PIIPattern]):
+        self.fixed_tail = 0
+        sources = []
+        flag_set = set()
+        for pattern in patterns:
+            flags = pattern.pattern.flags & ~re.VERBOSE
+            try:
+                parsed = _sre_parse.parse(pattern.pattern.pattern, pattern.pattern.flags)
+                sources.append(_prefix(list(parsed)))
+                flag_set.add(flags)
+            except (_Unsupported, re.error):
+                # No prefix language: hold back the longest possible match
+                width = _sre_parse.parse(pattern.pattern.pattern, pattern.pattern.flags)
+                self.fixed_tail = max(self.fixed_tail, width.getwidth()[1])
+        self.regex = None
+        if sources and len(flag_set) == 1:
+            self.regex = re.compile("(?:" + "|".join(sources) + r")\Z", flag_set.pop())
+        elif sources:
+            self.fixed_tail = _C.MAXREPEAT
+
+    def start(self, text: str, lowest: int) -> int:
+        """Earliest offset >= ``lowest`` from which a match could still grow"""
+        start = len(text)
+        if self.regex is not None:
+            start = self.regex.search(text, lowest).start()
+        if self.fixed_tail:
+            start = min(start, max(lowest, len(text) - self.fixed_tail))
+        return start
+
+
+_DETECTORS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+class StreamingRedactor:
+    """Redacts PII from text that arrives in chunks, such as streamed LLM tokens.
+
+    ``feed()`` returns the redacted text that is safe to release now. Only the
+    tail that could still grow into a match (a half-written email, the first
+    digits of a card number) is held back, so ordinary prose is released
+    almost as soon as it arrives. ``flush()`` releases the rest at the end of
+    the stream. The concatenated output equals redacting the whole text at
+    once with the same EnhancedPIIRedactor.
+
+    At most ``max_holdback`` characters are ever held back. A single match
+    longer than that (e.g. a multi-kilobyte bearer token) is cut at the
+    budget: the part seen so far is replaced, and the remainder is scanned
+    as new text.
+
+    ``counts`` holds the number of matches released so far, by pattern name.
+    """
+
+    def __init__(self, redactor: Optional[EnhancedPIIRedactor] = None, max_holdback: int = 1024):
+        if max_holdback <= 0:
+            raise ValueError("max_holdback must be positive")
+        self.redactor = redactor or EnhancedPIIRedactor()
+        self.max_holdback = max_holdback
+        engine = self.redactor._engine
+        self._tail = _DETECTORS.get(engine)
+        if self._tail is None:
+            self._tail = _DETECTORS[engine] = _TailDetector(engine.patterns)
+        # The last released character is kept so \b at the cut sees real context
+        self._context = ""
+        self._buffer = ""
+        self.counts: Dict[str, int] = {}
+
+    @property
+    def pending(self) -> int:
+        """Number of characters currently held back"""
+        return len(self._buffer)
+
+    def feed(self, chunk: str) -> str:
+        """Add ``chunk`` to the stream and return the text that can be released"""
+        if not chunk:
+            return ""
+        self._buffer += chunk
+        return self._release(final=False)
+
+    def flush(self) -> str:
+        """Release everything still held back; the stream may then be reused"""
+        output = self._release(final=True)
+        self._context = ""
+        return output
+
+    def redact_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Redact an iterable of chunks, yielding output as soon as it is safe"""
+        for chunk in chunks:
+            output = self.feed(chunk)
+            if output:
+                yield output
+        output = self.flush()
+        if output:
+            yield output
+
+    async def aredact_stream(self, chunks: AsyncIterable[str]) -> AsyncIterator[str]:
+        """Async counterpart of ``redact_stream`` for async token streams"""
+        async for chunk in chunks:
+            output = self.feed(chunk)
+            if output:
+                yield output
+        output = self.flush()
+        if output:
+            yield output
+
+    def _release(self, final: bool) -> str:
+        text = self._context + self._buffer
+        offset = len(self._context)
+        engine = self.redactor._select_engine(text)
+        spans = list(engine.spans(text, offset))
+        cut = len(text)
+        if not final:
+            budget = len(text) - self.max_holdback
+            cut = self._tail.start(text, max(offset, budget))
+            for k, (start, end, _) in enumerate(spans):
+                if end > cut:
+                    # A span cut short where this one starts would get its
+                    # full length back if this one changes, so it is held
+                    # back too, as long as the budget allows
+                    head = k
+                    while head and spans[head - 1][1] == spans[head][0]:
+                        head -= 1
+                    if budget <= spans[head][0] < cut:
+                        cut = spans[head][0]
+                    elif start < cut:
+                        # Hold a straddling match back whole if the budget allows
+                        cut = start if start >= budget else end
+                    break
+            cut = max(cut, offset)
+        if cut == offset:
+            return ""
+        names = engine.pattern_names
+        for start, _, index in spans:
+            if start >= cut:
+                break
+            self.counts[names[index]] = self.counts.get(names[index], 0) + 1
+        output = engine.render(text, spans, offset, cut)
+        self._context = text[cut - 1 : cut]
+        self._buffer = text[cut:]
+        return output
@@ -0,0 +1,203 @@
+"""Copy-on-write traversal of nested agent data"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_CONTAINERS = (dict, list, tuple)
+
+# A dict plan: values to replace outright, and the items left to traverse
+DictPlan = Tuple[Optional[Dict[Any, Any]], Iterable[Tuple[Any, Any]]]
+
+
+def transform(
+    data: Any,
+    leaf: Optional[Callable[..., Any]],
+    plan: Optional[Callable[[dict], DictPlan]] = None,
+    tuples: bool = True,
+    paths: bool = False,
+) -> Any:
+    """Apply ``leaf`` to every non-container value nested in dicts and lists
+
+    New containers are only built along paths where a value changed, i.e.
+    where ``leaf`` returned a different object; untouched subtrees are
+    returned as they are. Traversal uses an explicit stack, so nesting depth
+    is not limited by the recursion limit; a container nested inside itself
+    raises ValueError. With ``leaf=None`` leaves are left alone and only
+    ``plan`` replacements apply.
+
+    ``plan(d)`` is called for each dict and returns a new mapping of keys
+    whose values are replaced outright (or None) plus the ``(key, value)`` items
+    to traverse; items it leaves out are kept unchanged. Tuples are traversed
+    when ``tuples`` is true and treated as leaves otherwise. With ``paths``,
+    ``leaf`` is called as ``leaf(value, path)`` where ``path`` is the tuple
+    of keys and indices leading to the value.
+    """
+    containers = (dict, list, tuple) if tuples else (dict, list)
+    if not isinstance(data, containers):
+        if leaf is None:
+            return data
+        return leaf(data, ()) if paths else leaf(data)
+
+    # Frame: [container, (key, value) iterator, changes, path, key in parent]
+    stack = [[data, *_start(data, plan), (), None]]
+    on_path = {id(data)}
+    result = data
+    while stack:
+        frame = stack[-1]
+        container, items, changes, path, _ = frame
+        for key, value in items:
+            if isinstance(value, containers):
+                _enter(on_path, value)
+                child_path = path + (key,) if paths else ()
+                stack.append([value, *_start(value, plan), child_path, key])
+                break
+            if leaf is None:
+                continue
+            new = leaf(value, path + (key,)) if paths else leaf(value)
+            if new is not value:
+                changes = frame[2] = changes or {}
+                changes[key] = new
+        else:
+            stack.pop()
+            on_path.discard(id(container))
+            result = _rebuild(container, changes) if changes else container
+            if stack and result is not container:
+                parent = stack[-1]
+                if parent[2] is None:
+                    parent[2] = {}
+                parent[2][frame[4]] = result
+    return result
+
+
+def transform_columns(
+    records: List[Any],
+    column: Callable[[List[str]], List[str]],
+    other: Callable[[Any], Any],
+    masked: Optional[Callable[[Any], bool]] = None,
+    mask: Any = None,
+) -> List[Any]:
+    """Transform a batch of dict records column by column
+
+    The string values under each key are gathered into one list and passed
+    to ``column`` in a single call, which returns them transformed in the
+    same order. Nested containers go through ``other`` one by one, and so do
+    records that are not dicts; other values are left alone. When
+    ``masked(key)`` is true, every value under that key is replaced with
+    ``mask``; it is called once per distinct key.
+
+    Records are copied only where a value changed, as with ``transform``.
+    """
+    columns: Dict[Any, Tuple[List[int], List[str]]] = {}
+    decisions: Dict[Any, bool] = {}
+    changes: Dict[int, Any] = {}
+    for row, record in enumerate(records):
+        if not isinstance(record, dict):
+            new = other(record)
+            if new is not record:
+                changes[row] = new
+            continue
+        for key, value in record.items():
+            decision = decisions.get(key)
+            if decision is None:
+                decision = decisions[key] = masked is not None and masked(key)
+            if decision:
+                changes.setdefault(row, {})[key] = mask
+            elif isinstance(value, str):
+                rows, values = columns.setdefault(key, ([], []))
+                rows.append(row)
+                values.append(value)
+            elif isinstance(value, (dict, list, tuple)):
+                new = other(value)
+                if new is not value:
+                    changes.setdefault(row, {})[key] = new
+
+    for key, (rows, values) in columns.items():
+        for row, value, new in zip(rows, values, column(values)):
+            if new is not value:
+                changes.setdefault(row, {})[key] = new
+
+    result = list(records)
+    for row, change in changes.items():
+        if isinstance(records[row], dict):
+            result[row] = _rebuild(records[row], change)
+        else:
+            result[row] = change
+    return result
+
+
+def iter_leaves(data: Any) -> Iterator[Tuple[Tuple[Any, ...], Any]]:
+    """Yield ``(path, value)`` for every non-container value, in ``transform`` order
+
+    Lazy, so a caller looking for one value stops the walk as soon as it
+    has found it. A container nested inside itself raises ValueError.
+    """
+    if not isinstance(data, _CONTAINERS):
+        yield (), data
+        return
+    stack = [(data, (), _start(data, None)[0])]
+    on_path = {id(data)}
+    while stack:
+        container, path, items = stack[-1]
+        for key, value in items:
+            if isinstance(value, _CONTAINERS):
+                _enter(on_path, value)
+                stack.append((value, path + (key,), _start(value, None)[0]))
+                break
+            yield path + (key,), value
+        else:
+            stack.pop()
+            on_path.discard(id(container))
+
+
+def text_size(data: Any, limit: Optional[int] = None) -> int:
+    """Characters of text nested in ``data``, counting other leaves as one
+
+    Counting stops as soon as the total exceeds ``limit``. A container
+    nested inside itself raises ValueError.
+    """
+    if not isinstance(data, _CONTAINERS):
+        return len(data) if isinstance(data, str) else 1
+    size = 0
+    stack = [(data, iter(data.values() if isinstance(data, dict) else data))]
+    on_path = {id(data)}
+    while stack:
+        container, values = stack[-1]
+        for value in values:
+            if isinstance(value, _CONTAINERS):
+                _enter(on_path, value)
+                stack.append((value, iter(value.values() if isinstance(value, dict) else value)))
+                break
+            size += len(value) if isinstance(value, str) else 1
+            if limit is not None and size > limit:
+                return size
+        else:
+            stack.pop()
+            on_path.discard(id(container))
+    return size
+
+
+def _enter(on_path: set, container: Any):
+    """Mark ``container`` as being on the current path, refusing cycles"""
+    if id(container) in on_path:
+        raise ValueError(f"Circular reference to a {type(container).__name__} in data")
+    on_path.add(id(container))
+
+
+def _start(container, plan):
+    """Items to visit and initial changes for a container"""
+    if isinstance(container, dict):
+        if plan is not None:
+            replaced, items = plan(container)
+            return iter(items), replaced
+        return iter(container.items()), None
+    return enumerate(container), None
+
+
+def _rebuild(container, changes):
+    if isinstance(container, dict):
+        rebuilt = dict(container)
+        rebuilt.update(changes)
+        return rebuilt
+    rebuilt = list(container)
+    for index, value in changes.items():
+        rebuilt[index] = value
+    return tuple(rebuilt) if isinstance(container, tuple) else rebuilt
@@ -1,20 +1,27 @@
 """Black-box wrapper for agent monitoring"""
 
+import asyncio
 import hashlib
 import time
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from datetime import datetime, UTC
 from dataclasses import dataclass
 
 from .policy import Policy
-from .filters import PIIRedactor, TraceFilter
+from .filters import CombinedPIIRedactor, PIIRedactor, TraceFilter
 from .pii_patterns import EnhancedPIIRedactor
+from .cache import RedactionCache
+from .profiling import PatternProfiler
+from .traversal import text_size
 from .storage import MemoryStorage, PostgreSQLStorage
 from .metrics import InMemoryMetrics
 from .attestation import AttestationGenerator
 
 import logging
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,19 +48,36 @@ class BlackBoxWrapper:
         storage: str = "memory",
         metrics: Optional[Any] = None,
         use_enhanced_pii: bool = True,
+        pii_cache: Optional[RedactionCache] = None,
+        profile_pii: bool = False,
+        redaction_executor: Optional["Executor"] = None,
+        offload_threshold: Optional[int] = 256 * 1024,
     ):
         self.agent = agent
         self.policy = policy
         self.use_enhanced_pii = use_enhanced_pii
 
-        # Choose PII redactor based on flag
+        # Payloads with more than offload_threshold characters of text are
+        # redacted in redaction_executor (the loop's default thread pool if
+        # None) so they don't stall the event loop; None keeps all inline.
+        self.redaction_executor = redaction_executor
+        self.offload_threshold = offload_threshold
+        self.metrics = metrics or InMemoryMetrics()
+
+        # Per-pattern counters are flushed to metrics once per request
+        self.pii_profiler = PatternProfiler(self.metrics) if profile_pii else None
+
+        # Choose PII redactor based on flag: key masking plus value patterns,
+        # or key masking only
         if use_enhanced_pii:
-            self.pii_redactor = EnhancedPIIRedactor()
+            pattern_redactor = EnhancedPIIRedactor.for_policy(
+                policy, cache=pii_cache, profiler=self.pii_profiler
+            )
+            self.pii_redactor = CombinedPIIRedactor(policy, pattern_redactor)
         else:
             self.pii_redactor = PIIRedactor(policy)
 
         self.trace_filter = TraceFilter(policy)
-        self.metrics = metrics or InMemoryMetrics()
 
         # Handle storage as string or object
         if isinstance(storage, str):
@@ -84,7 +108,7 @@ class BlackBoxWrapper:
             self.metrics.record_break_glass()
 
         try:
-            redacted_input = self.pii_redactor.redact({"task": task, "payload": payload})
+            redacted_input = await self._redact({"task": task, "payload": payload})
             input_hash = self._compute_hash(redacted_input) if self.policy.keep_hashes else None
 
             if hasattr(self.agent, "run"):
@@ -107,7 +131,7 @@ class BlackBoxWrapper:
 
             # Redact PII from result if enabled
             if self.use_enhanced_pii:
-                result = self.pii_redactor.redact(result)
+                result = await self._redact(result)
 
             await self.storage.store_outcome(
                 {
@@ -122,6 +146,8 @@ class BlackBoxWrapper:
             )
 
             self.metrics.record_request("success", latency_ms, cost_cents)
+            if self.pii_profiler is not None:
+                self.pii_profiler.flush()
 
             attestation = None
             if self.policy.include_code_sha or self.policy.include_policy_hash:
@@ -162,6 +188,8 @@ class BlackBoxWrapper:
                 }
             )
             self.metrics.record_request("error", latency_ms, 0)
+            if self.pii_profiler is not None:
+                self.pii_profiler.flush()
 
             return BlackBoxResult(
                 request_id,
@@ -175,6 +203,13 @@ class BlackBoxWrapper:
                 {"error": str(e)},
             )
 
+    async def _redact(self, data: Any) -> Any:
+        threshold = self.offload_threshold
+        if threshold is None or text_size(data, threshold) <= threshold:
+            return self.pii_redactor.redact(data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.redaction_executor, self.pii_redactor.redact, data)
+
     def _parse_agent_result(self, agent_result: Any) -> tuple:
         if isinstance(agent_result, dict):
             result = agent_result.get("result", agent_result)
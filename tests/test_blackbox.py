@@ -1,14 +1,21 @@
 """Tests for roma-blackbox package"""
 
 import asyncio
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from roma_blackbox import (
     BlackBoxWrapper,
     Policy,
     MemoryStorage,
     PIIRedactor,
+    CombinedPIIRedactor,
     TraceFilter,
 )
+from roma_blackbox.cache import RedactionCache
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+from roma_blackbox.profiling import PatternProfiler
 
 
 class MockAgent:
@@ -87,6 +94,105 @@ class TestBlackBoxWrapper:
         assert outcome["request_id"] == "test_004"
         assert outcome["status"] == "success"
 
+    @pytest.mark.asyncio
+    async def test_redacts_pii_keys_and_values(self):
+        class ContactAgent:
+            async def run(self, task: str, **kwargs):
+                return {"result": {"email": "bob@example.com", "note": "cc amy@example.com"}}
+
+        wrapper = BlackBoxWrapper(ContactAgent(), Policy(pii_fields=["email"]), storage="memory")
+
+        result = await wrapper.run(request_id="test_005", task="Test task")
+
+        assert result.result == {"email": "***REDACTED***", "note": "cc [EMAIL]"}
+
+
+class TestRedactionOffload:
+    class RecordingExecutor(ThreadPoolExecutor):
+        def __init__(self):
+            super().__init__(max_workers=1)
+            self.calls = 0
+
+        def submit(self, fn, *args, **kwargs):
+            self.calls += 1
+            return super().submit(fn, *args, **kwargs)
+
+    class TextAgent:
+        def __init__(self, text):
+            self.text = text
+
+        async def run(self, task: str, **kwargs):
+            return {"result": {"text": self.text}}
+
+    @pytest.mark.asyncio
+    async def test_large_payloads_are_offloaded(self):
+        executor = self.RecordingExecutor()
+        text = "mail bob@example.com " * 100
+        wrapper = BlackBoxWrapper(
+            self.TextAgent(text), Policy(), redaction_executor=executor, offload_threshold=1000
+        )
+
+        result = await wrapper.run(request_id="big", task="summarise")
+        executor.shutdown()
+
+        assert executor.calls == 1
+        assert result.result["text"] == "mail [EMAIL] " * 100
+
+    @pytest.mark.asyncio
+    async def test_non_string_keys(self):
+        class KeyedAgent:
+            async def run(self, task: str, **kwargs):
+                return {"result": {200: "ok bob@example.com", ("a", 1): {"email": "x"}}}
+
+        wrapper = BlackBoxWrapper(KeyedAgent(), Policy())
+
+        result = await wrapper.run(request_id="keys", task="t")
+
+        assert result.status == "success"
+        assert result.result == {200: "ok [EMAIL]", ("a", 1): {"email": "***REDACTED***"}}
+
+    @pytest.mark.asyncio
+    async def test_circular_result_is_an_error(self):
+        class CyclicAgent:
+            async def run(self, task: str, **kwargs):
+                data = {"a": "bob@example.com"}
+                data["self"] = data
+                return {"result": data}
+
+        wrapper = BlackBoxWrapper(CyclicAgent(), Policy(), offload_threshold=0)
+
+        result = await asyncio.wait_for(wrapper.run(request_id="loop", task="t"), timeout=5)
+
+        assert result.status == "error"
+        assert "Circular reference" in result.result["error"]
+
+    @pytest.mark.asyncio
+    async def test_small_payloads_stay_inline(self):
+        executor = self.RecordingExecutor()
+        wrapper = BlackBoxWrapper(
+            self.TextAgent("mail bob@example.com"), Policy(), redaction_executor=executor
+        )
+
+        result = await wrapper.run(request_id="small", task="summarise")
+        executor.shutdown()
+
+        assert executor.calls == 0
+        assert result.result["text"] == "mail [EMAIL]"
+
+    def test_redactor_can_be_sent_to_processes(self):
+        policy = Policy(pii_fields=["email"])
+        redactor = CombinedPIIRedactor(
+            policy, EnhancedPIIRedactor(cache=RedactionCache(), profiler=PatternProfiler())
+        )
+
+        copy = pickle.loads(pickle.dumps(redactor))
+
+        assert copy.pattern_redactor.cache is None
+        assert copy.redact({"email": "x", "note": "bob@example.com"}) == {
+            "email": "***REDACTED***",
+            "note": "[EMAIL]",
+        }
+
 
 class TestPIIRedactor:
     def test_redact_simple_pii(self):
@@ -110,6 +216,132 @@ class TestPIIRedactor:
         assert redacted["user"]["email"] == "***REDACTED***"
         assert redacted["user"]["name"] == "John"
 
+    def test_field_matching_is_case_insensitive_substring(self):
+        redactor = PIIRedactor(Policy(pii_fields=["Email", "ip", "credit_card"]))
+        keys = ["email", "User_EMAIL", "zip", "tooltip", "name", "creditcard", "CREDIT_CARD_NO"]
+
+        assert [k for k in keys if redactor._is_pii_field(k)] == [
+            "email",
+            "User_EMAIL",
+            "zip",
+            "tooltip",
+            "CREDIT_CARD_NO",
+        ]
+
+    def test_field_decisions_are_cached_and_bounded(self):
+        redactor = PIIRedactor(Policy(pii_fields=["email"]))
+        redactor.MAX_KEYS = 3
+        for key in ["a", "b", "email", "c", "d"]:
+            redactor._is_pii_field(key)
+
+        assert list(redactor._field_decisions) == ["email", "c", "d"]
+        assert redactor._is_pii_field("email") is True
+
+    def test_no_fields_matches_nothing(self):
+        redactor = PIIRedactor(Policy(pii_fields=[]))
+
+        assert redactor.redact({"email": "bob@example.com"}) == {"email": "bob@example.com"}
+
+    def test_plans_are_reused_per_shape(self):
+        redactor = PIIRedactor(Policy(pii_fields=["email"]))
+        payloads = [{"user_email": f"u{i}@example.com", "id": i} for i in range(3)]
+
+        redacted = [redactor.redact(payload) for payload in payloads]
+
+        assert [r["user_email"] for r in redacted] == ["***REDACTED***"] * 3
+        assert [r["id"] for r in redacted] == [0, 1, 2]
+        assert len(redactor._plans) == 1
+
+    def test_plan_cache_is_bounded(self):
+        redactor = PIIRedactor(Policy(pii_fields=["email"]))
+        redactor.MAX_PLANS = 4
+        for i in range(10):
+            redactor.redact({f"key_{i}": i})
+
+        assert len(redactor._plans) == 4
+
+    def test_wide_dicts_are_not_planned(self):
+        redactor = PIIRedactor(Policy(pii_fields=["email"]))
+        wide = {f"field_{i}": i for i in range(redactor.MAX_PLAN_KEYS)}
+        wide["email"] = "bob@example.com"
+
+        redacted = redactor.redact(wide)
+
+        assert redacted["email"] == "***REDACTED***"
+        assert redacted["field_0"] == 0
+        assert redactor._plans == {}
+        redactor.redact({"email": "bob@example.com", "id": 1})
+        assert len(redactor._plans) == 1
+
+
+class TestCombinedPIIRedactor:
+    def test_masks_keys_and_redacts_values(self):
+        redactor = CombinedPIIRedactor(Policy(pii_fields=["email", "phone"]))
+        data = {"email": "bob@example.com", "notes": ["reach bob@example.com", "or 555-123-4567"]}
+
+        redacted = redactor.redact(data)
+
+        assert redacted == {"email": "***REDACTED***", "notes": ["reach [EMAIL]", "or [PHONE]"]}
+
+    def test_masked_values_are_not_scanned(self):
+        policy = Policy(pii_fields=["email"])
+        profiler = PatternProfiler()
+        redactor = CombinedPIIRedactor(
+            policy, EnhancedPIIRedactor.for_policy(policy, profiler=profiler)
+        )
+        masked = "x" * 40 + " bob@example.com"
+
+        redactor.redact({"user_email": masked, "note": "write to amy@example.com"})
+
+        stats = profiler.snapshot()["email"]
+        assert stats["matches"] == 1
+        assert stats["chars_scanned"] == len("write to amy@example.com")
+
+    @pytest.mark.parametrize(
+        "key",
+        ["user_email", "emails", "Phone Number", "phones", "addresses", "homeaddress"]
+        + ["shippingAddresses", "home-address", "ssn", "ssns", "clientIP", "clientIPs"]
+        + ["IPAddress", "ip_list", "ipv4"],
+    )
+    def test_field_keys_are_masked(self, key):
+        redactor = CombinedPIIRedactor(Policy())
+
+        assert redactor.redact({key: ["221B Baker Street"]}) == {key: "***REDACTED***"}
+
+    @pytest.mark.parametrize(
+        "key", ["description", "script", "recipient", "classname", "shipping", "tip"]
+    )
+    def test_short_fields_do_not_match_inside_words(self, key):
+        redactor = CombinedPIIRedactor(Policy())
+
+        assert redactor.redact({key: "x"}) == {key: "x"}
+
+    def test_multi_word_fields_ignore_separators(self):
+        redactor = CombinedPIIRedactor(Policy(pii_fields=["credit_card"]))
+        data = {"creditCardNumber": "x", "creditcard": "x", "card": "x", "credit": "x"}
+
+        redacted = redactor.redact(data)
+
+        assert [key for key in data if redacted[key] != "x"] == ["creditCardNumber", "creditcard"]
+
+    def test_clean_payload_is_returned_unchanged(self):
+        redactor = CombinedPIIRedactor(Policy())
+        data = {"result": {"output": "done", "items": [1, 2, 3]}}
+
+        assert redactor.redact(data) is data
+
+    def test_redact_records(self):
+        redactor = CombinedPIIRedactor(Policy(pii_fields=["email", "phone"]))
+        records = [
+            {"email": f"user{i}@example.com", "note": f"call 555-123-{i:04d}", "n": i}
+            for i in range(20)
+        ]
+
+        result = redactor.redact_records(records)
+
+        assert result == [redactor.redact(record) for record in records]
+        assert result[3] == {"email": "***REDACTED***", "note": "call [PHONE]", "n": 3}
+
 
 class TestTraceFilter:
     def test_filter_removes_traces(self):
@@ -0,0 +1,148 @@
+"""Tests for redaction result caching"""
+
+import threading
+
+import pytest
+from roma_blackbox import BlackBoxWrapper, Policy
+from roma_blackbox.cache import RedactionCache, remember
+from roma_blackbox.filters import CombinedPIIRedactor
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor, PIIPattern
+
+PROMPT = "You are a helpful agent. Escalate billing issues to billing@example.com promptly."
+
+
+class TestRedactionCache:
+    def test_hits_and_misses(self):
+        cache = RedactionCache()
+        redactor = EnhancedPIIRedactor(cache=cache)
+
+        first = redactor.redact(PROMPT)
+        second = redactor.redact(PROMPT)
+
+        assert first == second
+        assert "[EMAIL]" in first
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_short_strings_bypass_cache(self):
+        cache = RedactionCache(min_length=64)
+        redactor = EnhancedPIIRedactor(cache=cache)
+
+        assert redactor.redact("bob@example.com") == "[EMAIL]"
+        assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = RedactionCache(max_entries=2, min_length=0)
+        cache.put("a", "a", "A")
+        cache.put("b", "b", "B")
+        cache.get("a")
+        cache.put("c", "c", "C")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "A"
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_budget(self):
+        text = "x" * 1000
+        cache = RedactionCache(max_bytes=2500, min_length=0)
+        for i in range(5):
+            cache.put(i, text, text)
+
+        assert cache.bytes <= 2500
+        assert len(cache) == 2
+        assert cache.stats()["evictions"] == 3
+
+    def test_oversized_entry_is_not_stored(self):
+        cache = RedactionCache(max_bytes=100, min_length=0)
+        cache.put("big", "x" * 1000, "x" * 1000)
+
+        assert len(cache) == 0
+
+    def test_shared_between_pattern_sets(self):
+        cache = RedactionCache(min_length=0)
+        custom = PIIPattern("ticket", r"\bTICKET-\d+\b", "[TICKET]")
+        plain = EnhancedPIIRedactor(cache=cache)
+        extended = EnhancedPIIRedactor(custom_patterns=[custom], cache=cache)
+        text = "see TICKET-42 for details"
+
+        assert plain.redact(text) == text
+        assert extended.redact(text) == "see [TICKET] for details"
+
+    def test_concurrent_use(self):
+        cache = RedactionCache(max_entries=50, min_length=0)
+        redactor = EnhancedPIIRedactor(cache=cache)
+        texts = [f"user{i}@example.com wrote message {i}" for i in range(200)]
+        errors = []
+
+        def worker():
+            for text in texts:
+                if "@" in redactor.redact(text):
+                    errors.append(text)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert not errors
+        assert stats["entries"] <= 50
+        assert stats["hits"] + stats["misses"] == 800
+
+    def test_invalid_limits(self):
+        with pytest.raises(ValueError):
+            RedactionCache(max_entries=0)
+
+
+class TestRemember:
+    def test_evicts_oldest_entry(self):
+        table = {}
+        lock = threading.Lock()
+        for i in range(5):
+            assert remember(table, lock, i, str(i), 3) == str(i)
+
+        assert table == {2: "2", 3: "3", 4: "4"}
+
+    def test_shared_redactor_caches_under_concurrent_use(self):
+        policy = Policy(pii_fields=["email", "phone"])
+        redactor = CombinedPIIRedactor(policy, EnhancedPIIRedactor(enabled=policy.pii_fields))
+        redactor.field_redactor.MAX_PLANS = 4
+        redactor.field_redactor.MAX_KEYS = 4
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(300):
+                    record = {f"k{n}_{i % 17}": "x", f"user_email_{i % 5}": "x", "note": "x" * i}
+                    record["note"] += f" mail bob{i}@example.com or call 555-123-{i:04d}"
+                    redactor.redact(record)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert redactor.pattern_redactor.prefilter_stats()["strings"] == 8 * 300
+        assert len(redactor.field_redactor._plans) <= 4
+
+
+@pytest.mark.asyncio
+async def test_wrappers_share_cache():
+    class EchoAgent:
+        async def run(self, task: str, **kwargs):
+            return {"result": {"prompt": PROMPT}}
+
+    cache = RedactionCache()
+    wrappers = [
+        BlackBoxWrapper(EchoAgent(), Policy(), storage="memory", pii_cache=cache) for _ in range(2)
+    ]
+    for i, wrapper in enumerate(wrappers):
+        result = await wrapper.run(request_id=f"req_{i}", task="summarise")
+        assert "[EMAIL]" in result.result["prompt"]
+
+    assert cache.stats()["hits"] >= 1
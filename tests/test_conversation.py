@@ -0,0 +1,82 @@
+"""Tests for incremental conversation redaction"""
+
+import pytest
+from roma_blackbox.conversation import ConversationRedactor
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+
+
+class CountingRedactor(EnhancedPIIRedactor):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def redact(self, data):
+        self.calls += 1
+        return super().redact(data)
+
+
+def history(turns):
+    return [
+        {"role": "user", "content": f"turn {i}: mail user{i}@example.com"} for i in range(turns)
+    ]
+
+
+class TestConversationRedactor:
+    def test_only_new_messages_are_redacted(self):
+        redactor = CountingRedactor()
+        conversations = ConversationRedactor(redactor)
+
+        for turns in range(1, 11):
+            redacted = conversations.redact("conv-1", history(turns))
+
+        assert redactor.calls == 10
+        assert redacted == [redactor.redact(message) for message in history(10)]
+        assert conversations.stats()["hits"] == 45
+
+    def test_conversations_are_separate(self):
+        redactor = CountingRedactor()
+        conversations = ConversationRedactor(redactor)
+
+        conversations.redact("a", ["mail bob@example.com"])
+        result = conversations.redact("b", ["mail bob@example.com"])
+
+        assert result == ["mail [EMAIL]"]
+        assert redactor.calls == 2
+
+    def test_equal_text_of_different_types_is_not_confused(self):
+        conversations = ConversationRedactor()
+
+        assert conversations.redact("c", ["1", 1]) == ["1", 1]
+
+    def test_memory_is_bounded(self):
+        conversations = ConversationRedactor(max_conversations=2, max_messages=3)
+        for conversation in "abc":
+            conversations.redact(conversation, [f"message {i}" for i in range(5)])
+
+        stats = conversations.stats()
+        assert stats["conversations"] == 2
+        assert stats["messages"] == 6
+
+    def test_history_longer_than_the_cap(self):
+        redactor = CountingRedactor()
+        conversations = ConversationRedactor(redactor, max_messages=100)
+        conversations.redact("long", history(101))
+        redactor.calls = 0
+
+        for turns in range(102, 106):
+            redacted = conversations.redact("long", history(turns))
+
+        # The first 100 messages keep hitting; only the ones past the cap are redone
+        assert redactor.calls == sum(turns - 100 for turns in range(102, 106))
+        assert redacted == [redactor.redact(message) for message in history(105)]
+
+    def test_forget(self):
+        conversations = ConversationRedactor()
+        conversations.redact("a", ["hello"])
+        conversations.forget("a")
+
+        assert conversations.stats()["conversations"] == 0
+
+    def test_invalid_limits(self):
+        with pytest.raises(ValueError):
+            ConversationRedactor(max_messages=0)
@@ -0,0 +1,53 @@
+"""Tests for lazy package imports"""
+
+import subprocess
+import sys
+
+import pytest
+import roma_blackbox
+
+
+def imported_after(statement: str) -> set:
+    script = f"import sys; {statement}; print(' '.join(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return set(output.split())
+
+
+def test_package_import_loads_no_submodules():
+    modules = imported_after("import roma_blackbox")
+
+    assert not {m for m in modules if m.startswith("roma_blackbox.")}
+    assert "asyncio" not in modules
+
+
+def test_wrapper_import_skips_optional_modules():
+    modules = imported_after("from roma_blackbox import BlackBoxWrapper")
+
+    assert "roma_blackbox.wrapper" in modules
+    assert "roma_blackbox.integrations" not in modules
+    assert "roma_blackbox.streaming" not in modules
+
+
+def test_builtin_patterns_compile_on_first_use():
+    modules = imported_after(
+        "from roma_blackbox.pii_patterns import EnhancedPIIRedactor; "
+        "assert all(p._compiled is None for p in EnhancedPIIRedactor.PATTERNS)"
+    )
+
+    assert "roma_blackbox.pii_patterns" in modules
+
+
+def test_lazy_exports_resolve():
+    from roma_blackbox.wrapper import BlackBoxWrapper
+
+    assert roma_blackbox.BlackBoxWrapper is BlackBoxWrapper
+    assert "EnhancedPIIRedactor" in dir(roma_blackbox)
+    for name in roma_blackbox.__all__:
+        assert getattr(roma_blackbox, name) is not None
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        roma_blackbox.does_not_exist
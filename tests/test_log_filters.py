@@ -0,0 +1,98 @@
+"""Tests for PII redaction in application logs"""
+
+import io
+import logging
+
+import pytest
+from roma_blackbox.log_filters import BackgroundRedactingHandler, RedactingLogFilter
+
+
+@pytest.fixture
+def log():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    logger = logging.getLogger(f"roma_blackbox.tests.{id(stream)}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(handler)
+    yield logger, handler, stream
+    logger.removeHandler(handler)
+
+
+class TestRedactingLogFilter:
+    def test_redacts_formatted_message(self, log):
+        logger, handler, stream = log
+        handler.addFilter(RedactingLogFilter())
+
+        logger.info("user %s logged in from %s", "bob@example.com", "10.0.0.1")
+
+        assert stream.getvalue() == "user [EMAIL] logged in from [IP_ADDRESS]\n"
+
+    def test_messages_without_args_are_not_retained(self, log):
+        logger, handler, stream = log
+        log_filter = RedactingLogFilter()
+        handler.addFilter(log_filter)
+
+        for _ in range(3):
+            logger.warning("contact admin@example.com")
+
+        assert stream.getvalue() == "[EMAIL]\n".join(["contact "] * 3) + "[EMAIL]\n"
+        assert "admin@example.com" not in repr(vars(log_filter))
+
+    def test_skipped_records_are_not_redacted(self, log):
+        logger, handler, stream = log
+        handler.setLevel(logging.WARNING)
+        log_filter = RedactingLogFilter()
+        handler.addFilter(log_filter)
+        seen = []
+        log_filter.redact_record = seen.append
+
+        logger.debug("debug for %s", "bob@example.com")
+        logger.warning("warning")
+
+        assert [record.levelno for record in seen] == [logging.WARNING]
+
+    def test_redacts_exception_text(self, log):
+        logger, handler, stream = log
+        handler.addFilter(RedactingLogFilter())
+
+        try:
+            raise ValueError("bad card 4532 1488 0343 6467")
+        except ValueError:
+            logger.exception("failed for %s", "bob@example.com")
+
+        output = stream.getvalue()
+        assert "failed for [EMAIL]" in output
+        assert "ValueError: bad card [CREDIT_CARD]" in output
+        assert "4532" not in output
+
+
+class TestBackgroundRedactingHandler:
+    def test_redacts_on_background_thread(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        handler = BackgroundRedactingHandler(target, batch_size=4)
+        logger = logging.getLogger("roma_blackbox.tests.background")
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for i in range(10):
+                logger.warning("order %d for user%d@example.com", i, i)
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        lines = stream.getvalue().splitlines()
+        assert lines == [f"order {i} for [EMAIL]" for i in range(10)]
+
+    def test_respects_target_level(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setLevel(logging.ERROR)
+        handler = BackgroundRedactingHandler(target)
+        record = logging.LogRecord("x", logging.INFO, __file__, 1, "hidden", None, None)
+
+        handler.handle(record)
+        handler.close()
+
+        assert stream.getvalue() == ""
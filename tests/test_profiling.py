@@ -0,0 +1,114 @@
+"""Tests for per-pattern redaction profiling"""
+
+import pytest
+from roma_blackbox import BlackBoxWrapper, Policy
+from roma_blackbox.metrics import AbstractMetrics, InMemoryMetrics, NoOpMetrics
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+from roma_blackbox.profiling import PatternProfiler
+
+TEXT = "mail bob@example.com or amy@example.com, SSN 123-45-6789"
+
+
+class CountingMetrics(NoOpMetrics):
+    def __init__(self):
+        self.batches = []
+
+    def record_pii_batch(self, profile):
+        self.batches.append(profile)
+
+
+class TestPatternProfiler:
+    def test_counts_matches_and_volume(self):
+        profiler = PatternProfiler()
+        redactor = EnhancedPIIRedactor(profiler=profiler)
+
+        assert redactor.redact(TEXT) == "mail [EMAIL] or [EMAIL], SSN [SSN]"
+        stats = profiler.snapshot()
+
+        assert stats["email"]["matches"] == 2
+        assert stats["ssn"]["matches"] == 1
+        assert stats["email"]["chars_scanned"] == len(TEXT)
+
+    def test_times_patterns_on_sampled_strings(self):
+        profiler = PatternProfiler(sample_every=3)
+        redactor = EnhancedPIIRedactor(profiler=profiler)
+
+        redactor.redact([TEXT] * 7)
+        stats = profiler.snapshot()
+
+        assert stats["email"]["chars_scanned"] == 7 * len(TEXT)
+        assert stats["email"]["chars_timed"] == 2 * len(TEXT)
+        assert all(entry["seconds"] > 0 for entry in stats.values())
+
+    def test_unsampled_strings_are_not_timed(self):
+        profiler = PatternProfiler(sample_every=1000)
+        EnhancedPIIRedactor(profiler=profiler).redact(TEXT)
+
+        assert all(
+            entry["chars_timed"] == entry["seconds"] == 0 for entry in profiler.snapshot().values()
+        )
+
+    def test_prefiltered_patterns_are_not_counted(self):
+        profiler = PatternProfiler()
+        EnhancedPIIRedactor(profiler=profiler).redact("nothing sensitive in this text")
+
+        assert "email" not in profiler.snapshot()
+
+    def test_flushes_in_batches(self):
+        metrics = CountingMetrics()
+        redactor = EnhancedPIIRedactor(profiler=PatternProfiler(metrics, flush_every=10))
+
+        redactor.redact([TEXT] * 25)
+
+        assert len(metrics.batches) == 2
+        assert sum(batch["email"]["matches"] for batch in metrics.batches) == 40
+
+    def test_in_memory_metrics(self):
+        metrics = InMemoryMetrics()
+        profiler = PatternProfiler(metrics)
+        EnhancedPIIRedactor(profiler=profiler).redact(TEXT)
+        profiler.flush()
+        profiler.flush()
+
+        assert metrics.pii_redactions_by_field == {"email": 2, "ssn": 1}
+        assert metrics.pii_profile["ssn"]["chars_scanned"] == len(TEXT)
+
+    def test_default_batch_handler_is_a_no_op(self):
+        class FieldMetrics(AbstractMetrics):
+            record_request = record_trace_strip = record_break_glass = get_summary = None
+
+            def __init__(self):
+                self.fields = []
+
+            def record_pii_redaction(self, field):
+                self.fields.append(field)
+
+        metrics = FieldMetrics()
+        batch = {"email": {"matches": 2, "chars_scanned": 9, "chars_timed": 0, "seconds": 0.0}}
+        metrics.record_pii_batch(batch)
+
+        assert metrics.fields == []
+
+    def test_invalid_flush_every(self):
+        with pytest.raises(ValueError):
+            PatternProfiler(flush_every=0)
+
+    def test_invalid_sample_every(self):
+        with pytest.raises(ValueError):
+            PatternProfiler(sample_every=0)
+
+
+@pytest.mark.asyncio
+async def test_wrapper_flushes_per_request():
+    class EchoAgent:
+        async def run(self, task: str, **kwargs):
+            return {"result": {"text": TEXT}}
+
+    metrics = InMemoryMetrics()
+    wrapper = BlackBoxWrapper(
+        EchoAgent(), Policy(pii_fields=["email"]), metrics=metrics, profile_pii=True
+    )
+    await wrapper.run(request_id="req_1", task="summarise")
+
+    assert metrics.get_summary()["pii_redactions"] == {"email": 2}
+    assert set(metrics.pii_profile) == {"email"}
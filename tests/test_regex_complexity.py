@@ -0,0 +1,71 @@
+"""Worst-case running time of the built-in PII patterns"""
+
+import time
+
+import pytest
+from roma_blackbox.cache import RedactionCache
+from roma_blackbox.pii_patterns import CompiledPatternSet, EnhancedPIIRedactor
+
+# Inputs made of one repeated unit (plus a trailing "@" so the email prefilter
+# passes); each of these used to, or could plausibly, cause backtracking.
+# Growth exponents are measured by benchmarks/fuzz_regex_growth.py; here a
+# fixed 100k-character input only has to finish well within a generous bound,
+# which a linear scan meets by two orders of magnitude on a busy machine and
+# a quadratic one misses by far more.
+UNITS = ["a.", "b.", "a@", "1-", "1 ", "1.", "1234-", "a", "1", "0x1", "ghp_a"]
+SIZE = 100_000
+MAX_SECONDS = 2.0
+
+
+def worst_time(findall) -> tuple:
+    worst = (0.0, "")
+    for unit in UNITS:
+        text = unit * (SIZE // len(unit)) + "@"
+        start = time.perf_counter()
+        findall(text)
+        worst = max(worst, (time.perf_counter() - start, unit))
+    return worst
+
+
+@pytest.mark.parametrize("pattern", EnhancedPIIRedactor.PATTERNS, ids=lambda p: p.name)
+def test_patterns_run_in_linear_time(pattern):
+    worst = worst_time(pattern.pattern.findall)
+
+    assert worst[0] < MAX_SECONDS, worst
+
+
+def test_combined_scan_runs_in_linear_time():
+    engine = CompiledPatternSet(EnhancedPIIRedactor.PATTERNS)
+    worst = worst_time(lambda text: list(engine.spans(text)))
+
+    assert worst[0] < MAX_SECONDS, worst
+
+
+def test_email_parts_up_to_rfc_limits_are_redacted():
+    text = "x" * 64 + "@" + "d" * 240 + ".com"
+
+    assert EnhancedPIIRedactor().redact(text) == "[EMAIL]"
+
+
+class TestGuardMode:
+    def test_falls_back_to_masking_digits(self):
+        redactor = EnhancedPIIRedactor(time_budget=0)
+
+        result = redactor.redact("mail bob@example.com, card 4532 1488 0343 6467, ref 42")
+
+        assert result == "mail [EMAIL], card #### #### #### ####, ref ##"
+        assert redactor.budget_exceeded == 1
+
+    def test_within_budget_is_unchanged(self):
+        redactor = EnhancedPIIRedactor(time_budget=10)
+        text = "mail bob@example.com, card 4532 1488 0343 6467"
+
+        assert redactor.redact(text) == EnhancedPIIRedactor().redact(text)
+        assert redactor.budget_exceeded == 0
+
+    def test_fallback_is_not_cached(self):
+        cache = RedactionCache(min_length=0)
+        redactor = EnhancedPIIRedactor(time_budget=0, cache=cache)
+        redactor.redact("mail bob@example.com about 123-45-6789")
+
+        assert len(cache) == 0
@@ -0,0 +1,58 @@
+"""Tests for sharded redaction of large strings"""
+
+import pytest
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor, PIIPattern
+from roma_blackbox.sharding import ShardedRedactor, barrier_chars
+
+LINE = (
+    "[worker-3] user john.doe@example.com; card 4532 1488 0343 6467, ssn 123-45-6789, "
+    "call (555) 123-4567 <ok> from 10.0.0.1 token Bearer abc.def# done\n"
+)
+
+
+class TestBarrierChars:
+    def test_builtin_patterns(self):
+        barriers = barrier_chars(EnhancedPIIRedactor.PATTERNS)
+
+        for char in ",;<>#[]":
+            assert char in barriers
+        for char in "@.-( \n\tax0_":
+            assert char not in barriers
+
+    def test_unprovable_patterns_have_no_barriers(self):
+        assert barrier_chars([PIIPattern("any", r"id:.+", "[ID]")]) == ""
+        assert barrier_chars([PIIPattern("repeat", r"\b(\w+)-\1\b", "[REPEAT]")]) == ""
+
+
+class TestShardedRedactor:
+    def test_cuts_follow_barriers(self):
+        sharded = ShardedRedactor(shard_size=50)
+        text = LINE * 10
+
+        cuts = sharded.cuts(text)
+
+        assert cuts
+        assert all(text[cut - 1] in sharded.barriers for cut in cuts)
+        assert all(b - a >= 50 for a, b in zip([0] + cuts, cuts))
+
+    @pytest.mark.parametrize("shard_size", [7, 64, 500])
+    def test_matches_serial_redaction(self, shard_size):
+        redactor = EnhancedPIIRedactor()
+        text = LINE * 40
+
+        result = ShardedRedactor(redactor, workers=2, shard_size=shard_size).redact(text)
+
+        assert result == redactor.redact(text)
+        assert "john.doe" not in result
+
+    def test_small_or_unsplittable_text_stays_in_process(self):
+        any_char = PIIPattern("any", r"id:.{4}", "[ID]")
+        redactor = EnhancedPIIRedactor(custom_patterns=[any_char])
+        sharded = ShardedRedactor(redactor, workers=2, shard_size=10)
+
+        assert sharded.cuts(LINE * 10) == []
+        assert sharded.redact("see id:1234, " * 10) == "see [ID], " * 10
+
+    def test_invalid_shard_size(self):
+        with pytest.raises(ValueError):
+            ShardedRedactor(shard_size=0)
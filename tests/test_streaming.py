@@ -0,0 +1,125 @@
+"""Tests for streaming PII redaction"""
+
+import random
+
+import pytest
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor, PIIPattern
+from roma_blackbox.streaming import StreamingRedactor
+
+TEXT = (
+    "Hi team, the customer john.doe@example.com called from 555-123-4567 about "
+    "card 4532 1488 0343 6467. Their SSN is 123-45-6789 and the deploy key was "
+    "sk-abcdefghijklmnopqrstuvwxyz123456. Nothing else to report today.\n"
+)
+
+
+def chunked(text, sizes):
+    position = 0
+    for size in sizes:
+        if position >= len(text):
+            break
+        yield text[position : position + size]
+        position += size
+    if position < len(text):
+        yield text[position:]
+
+
+class TestStreamingRedactor:
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 1000])
+    def test_matches_batch_redaction(self, size):
+        redactor = EnhancedPIIRedactor()
+        stream = StreamingRedactor(redactor)
+
+        output = "".join(stream.redact_stream(chunked(TEXT, [size] * len(TEXT))))
+
+        assert output == redactor.redact(TEXT)
+        assert "john.doe" not in output
+
+    def test_random_chunking(self):
+        redactor = EnhancedPIIRedactor()
+        rng = random.Random(7)
+        alphabet = "ab1234567890 -.@:_\nsk-xyzghp"
+        for _ in range(200):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 120)))
+            text += TEXT[rng.randint(0, len(TEXT)) :]
+            sizes = [rng.randint(1, 9) for _ in range(len(text))]
+            output = "".join(StreamingRedactor(redactor).redact_stream(chunked(text, sizes)))
+            assert output == redactor.redact(text), text
+
+    @pytest.mark.parametrize(
+        "text", ["Bearer abc_bob@example.com_", "Bearer abc_bob@example.com z"]
+    )
+    def test_span_cut_short_by_a_later_match_is_held_back(self, text):
+        # Until the character after ".com" arrives it is unknown whether the
+        # email exists and the bearer token has to give up its tail to it
+        redactor = EnhancedPIIRedactor()
+
+        for size in range(1, len(text) + 1):
+            output = "".join(StreamingRedactor(redactor).redact_stream(chunked(text, [size] * 40)))
+            assert output == redactor.redact(text), size
+
+    def test_holdback_is_bounded_with_chained_spans(self):
+        # The API key is cut short by the bearer token, whose match then keeps
+        # growing far past the budget
+        stream = StreamingRedactor(max_holdback=256)
+        chunks = ["x api_key=" + "k" * 24 + "-Bearer ", "ab.c" * 2500, "ab.c" * 10, " end"]
+
+        output = ""
+        for chunk in chunks:
+            output += stream.feed(chunk)
+            assert stream.pending <= 256
+        output += stream.flush()
+
+        assert "k" * 24 not in output
+        assert output.endswith(" end")
+
+    def test_releases_prose_promptly(self):
+        stream = StreamingRedactor()
+
+        assert stream.feed("The meeting moved to ") == "The meeting moved to "
+        assert stream.feed("Thursday. Mail ") == "Thursday. Mail "
+        assert stream.feed("bob@exa") == ""
+        # "now." could still be the start of another address
+        assert stream.feed("mple.com now.") == "[EMAIL] "
+        assert stream.flush() == "now."
+
+    def test_holdback_is_bounded(self):
+        stream = StreamingRedactor(max_holdback=32)
+        for _ in range(50):
+            stream.feed("7" * 10)
+            assert stream.pending <= 32
+        stream.flush()
+        assert stream.pending == 0
+
+    def test_custom_patterns(self):
+        custom = PIIPattern("ticket", r"\bTICKET-\d{4}\b", "[TICKET]")
+        stream = StreamingRedactor(EnhancedPIIRedactor(custom_patterns=[custom]))
+
+        output = "".join(stream.redact_stream(["see TIC", "KET-12", "34 now"]))
+
+        assert output == "see [TICKET] now"
+
+    def test_counts_released_matches(self):
+        stream = StreamingRedactor()
+
+        for size in (5, 11):
+            list(stream.redact_stream(chunked(TEXT, [size] * len(TEXT))))
+
+        assert stream.counts == {"email": 2, "phone": 2, "credit_card": 2, "ssn": 2}
+
+    def test_invalid_holdback(self):
+        with pytest.raises(ValueError):
+            StreamingRedactor(max_holdback=0)
+
+
+@pytest.mark.asyncio
+async def test_async_stream():
+    async def tokens():
+        for chunk in chunked(TEXT, [4] * len(TEXT)):
+            yield chunk
+
+    redactor = EnhancedPIIRedactor()
+    parts = [part async for part in StreamingRedactor(redactor).aredact_stream(tokens())]
+
+    assert "".join(parts) == redactor.redact(TEXT)
+    assert len(parts) > 1
@@ -0,0 +1,168 @@
+"""Tests for copy-on-write traversal"""
+
+import sys
+
+from roma_blackbox import Policy
+from roma_blackbox.filters import PIIRedactor
+from roma_blackbox.pii_patterns import EnhancedPIIRedactor
+import pytest
+from roma_blackbox.traversal import iter_leaves, text_size, transform, transform_columns
+
+
+def upper(value):
+    return value.upper() if isinstance(value, str) else value
+
+
+class TestTransform:
+    def test_unchanged_data_is_returned_by_identity(self):
+        data = {"a": [1, 2, {"b": (3, 4)}], "c": None}
+
+        assert transform(data, lambda value: value) is data
+
+    def test_only_changed_paths_are_copied(self):
+        clean = {"numbers": [1, 2, 3]}
+        dirty = ["x", 1]
+        data = {"clean": clean, "dirty": dirty, "tuple": (5, "y")}
+
+        result = transform(data, upper)
+
+        assert result == {"clean": clean, "dirty": ["X", 1], "tuple": (5, "Y")}
+        assert result is not data
+        assert result["clean"] is clean
+        assert result["dirty"] is not dirty
+        assert data == {"clean": clean, "dirty": ["x", 1], "tuple": (5, "y")}
+
+    def test_deep_nesting_does_not_recurse(self):
+        data = "leaf"
+        for _ in range(sys.getrecursionlimit() * 2):
+            data = [data]
+
+        result = transform(data, upper)
+
+        for _ in range(sys.getrecursionlimit() * 2):
+            result = result[0]
+        assert result == "LEAF"
+
+    def test_plan_hook_and_paths(self):
+        seen = []
+
+        def leaf(value, path):
+            seen.append(path)
+            return value
+
+        def plan(d):
+            replaced = {"secret": "hidden"} if "secret" in d else None
+            return replaced, [(k, v) for k, v in d.items() if k not in ("secret", "skip")]
+
+        data = {"secret": {"x": 1}, "skip": [1], "items": [{"y": 2}], "t": (3,)}
+        result = transform(data, leaf, plan=plan, tuples=False, paths=True)
+
+        assert result == {"secret": "hidden", "skip": [1], "items": [{"y": 2}], "t": (3,)}
+        assert result["items"] is data["items"]
+        assert seen == [("items", 0, "y"), ("t",)]
+
+    def test_without_leaf(self):
+        data = {"a": ["x", {"b": "y"}]}
+
+        assert transform(data, None) is data
+
+
+class TestCycles:
+    def cyclic(self):
+        data = {"a": "x", "items": [1, 2]}
+        data["items"].append(data)
+        return data
+
+    def test_transform_refuses_cycles(self):
+        with pytest.raises(ValueError, match="Circular reference"):
+            transform(self.cyclic(), upper)
+
+    def test_iter_leaves_refuses_cycles(self):
+        with pytest.raises(ValueError, match="Circular reference"):
+            list(iter_leaves(self.cyclic()))
+
+    def test_text_size_refuses_cycles(self):
+        with pytest.raises(ValueError, match="Circular reference"):
+            text_size(self.cyclic())
+
+    def test_shared_subtrees_are_not_cycles(self):
+        shared = {"b": "y"}
+        data = {"first": shared, "second": [shared, shared]}
+
+        assert transform(data, upper) == {"first": {"b": "Y"}, "second": [{"b": "Y"}] * 2}
+        assert len(list(iter_leaves(data))) == 3
+        assert text_size(data) == 3
+
+
+class TestIterLeaves:
+    def test_paths_follow_transform_order(self):
+        data = {"a": [1, {"b": "x"}, (2, 3)], "c": None, "d": {}}
+        seen = []
+        transform(data, lambda value, path: seen.append((path, value)), paths=True)
+
+        assert list(iter_leaves(data)) == seen
+        assert list(iter_leaves("bare")) == [((), "bare")]
+
+
+class TestTransformColumns:
+    def test_strings_are_transformed_per_column(self):
+        calls = []
+
+        def column(values):
+            calls.append(list(values))
+            return [value.upper() for value in values]
+
+        records = [{"a": "x", "b": 1}, {"a": "y", "b": "z"}, "loose"]
+
+        result = transform_columns(records, column, upper)
+
+        assert result == [{"a": "X", "b": 1}, {"a": "Y", "b": "Z"}, "LOOSE"]
+        assert calls == [["x", "y"], ["z"]]
+
+    def test_masked_keys_are_decided_once(self):
+        decided = []
+
+        def masked(key):
+            decided.append(key)
+            return key == "secret"
+
+        records = [{"secret": i, "name": "n"} for i in range(3)]
+
+        result = transform_columns(records, list, upper, masked=masked, mask="***")
+
+        assert result == [{"secret": "***", "name": "n"}] * 3
+        assert decided == ["secret", "name"]
+
+    def test_unchanged_records_are_shared(self):
+        clean = {"a": "x", "nested": {"b": "y"}}
+        records = [clean, {"a": "z"}]
+
+        result = transform_columns(
+            records, lambda values: [v if v != "z" else "Z" for v in values], lambda value: value
+        )
+
+        assert result[0] is clean
+        assert result[1] == {"a": "Z"}
+        assert records[1] == {"a": "z"}
+
+
+class TestRedactorsShareUnchangedObjects:
+    def test_enhanced_redactor(self):
+        clean = {"summary": "All systems nominal", "steps": ["plan", "act"]}
+        data = {"clean": clean, "contact": {"email": "bob@example.com"}}
+
+        result = EnhancedPIIRedactor().redact(data)
+
+        assert result["clean"] is clean
+        assert result["contact"] == {"email": "[EMAIL]"}
+        assert EnhancedPIIRedactor().redact(clean) is clean
+
+    def test_field_redactor(self):
+        clean = [{"name": "widget"}]
+        data = {"items": clean, "user": {"email": "bob@example.com"}}
+
+        result = PIIRedactor(Policy()).redact(data)
+
+        assert result["items"] is clean
+        assert result["user"]["email"] == PIIRedactor.REDACTED_VALUE
+        assert data["user"]["email"] == "bob@example.com"